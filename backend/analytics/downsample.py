@@ -0,0 +1,76 @@
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+from observability import timed_phase
+
+
+def last_valid(y: np.ndarray) -> float:
+    valid = y[~np.isnan(y)]
+    return valid[-1] if len(valid) else np.nan
+
+
+def lttb_indices(x: np.ndarray, ys: Sequence[np.ndarray], n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets selection shared by several series on one x axis.
+
+    The first and last points are always kept; the points in between are split
+    into n_out - 2 equal-count buckets and one point is kept per bucket: the one
+    forming the largest triangle with the previously kept point and the mean of
+    the next bucket. With several series the per-series areas are combined with
+    fmax, so a peak in any series keeps its point. NaNs (e.g. missing actuals)
+    are ignored when averaging and never win a bucket on their own.
+
+    Bucket means are computed in one reduceat pass; each bucket's area search is
+    a vector operation, and only the chaining of anchors is sequential.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    x = x - x[0]  # keep epoch-ms magnitudes out of the area products
+    ys = [np.asarray(y, dtype=np.float64) for y in ys]
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)  # bucket b covers [edges[b], edges[b + 1])
+    starts = edges[:-1]
+    counts = np.diff(edges)
+
+    # reduceat's last segment runs to the end of its input, so cut the input at edges[-1] (the last point).
+    end = edges[-1]
+    x_mean = np.add.reduceat(x[:end], starts) / counts
+    y_means = []
+    for y in ys:
+        valid = ~np.isnan(y[:end])
+        sums = np.add.reduceat(np.where(valid, y[:end], 0.0), starts)
+        n_valid = np.add.reduceat(valid.astype(np.int64), starts)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            y_means.append(sums / n_valid)
+    # The final bucket looks ahead to the last point itself (its last valid value: the latest actuals are usually missing).
+    x_next = np.append(x_mean[1:], x[-1])
+    y_next = [np.append(m[1:], last_valid(y)) for m, y in zip(y_means, ys)]
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for b, (lo, hi) in enumerate(zip(starts, edges[1:])):
+        xb = x[lo:hi]
+        area = np.full(hi - lo, -np.inf)
+        for y, yn in zip(ys, y_next):
+            with np.errstate(invalid="ignore"):
+                area = np.fmax(area, np.abs((x[a] - x_next[b]) * (y[lo:hi] - y[a]) - (x[a] - xb) * (yn[b] - y[a])))
+        a = lo + int(np.argmax(area))
+        selected[b + 1] = a
+    return selected
+
+
+@timed_phase("transform")
+def downsample_frame(df: pd.DataFrame, max_points: int) -> pd.DataFrame:
+    """LTTB-downsample an API forecast frame to at most max_points rows, keeping forecast and actual aligned."""
+    if len(df) <= max_points:
+        return df
+    x = df["target_timestamp"].to_numpy(dtype=np.int64)
+    ys = [df[c].to_numpy(dtype=np.float64, na_value=np.nan) for c in ("forecast_value", "actual_value") if c in df.columns]
+    return df.iloc[lttb_indices(x, ys, max_points)]
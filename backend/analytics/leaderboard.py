@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+RANKING_METRICS = ("rmse", "smape", "mae")
+
+
+def feeder_metrics_chunk(feeder_ids: np.ndarray, forecast: np.ndarray, actual: np.ndarray, bounds: np.ndarray) -> pd.DataFrame:
+    """
+    Accuracy metrics for a chunk of feeders whose series are concatenated end to end.
+
+    Feeder i owns rows bounds[i]:bounds[i + 1]. Works on plain arrays, so a
+    chunk is a handful of vectorized reductions. Semantics follow
+    analytics.metrics.compute_metrics; feeders without rows get count 0 and NaN
+    metrics.
+    """
+    counts = np.diff(bounds)
+    out = pd.DataFrame({"feeder_id": feeder_ids, "count": counts})
+    for metric in RANKING_METRICS:
+        out[metric] = np.nan
+    nonempty = counts > 0
+    if not nonempty.any():
+        return out
+
+    load = np.where(np.isnan(actual), forecast, actual)
+    error = load - forecast
+    abs_error = np.abs(error)
+    denom = (np.abs(load) + np.abs(forecast)) / 2
+    denom[denom == 0] = 1.0
+
+    starts = bounds[:-1][nonempty]
+    n = counts[nonempty]
+    out.loc[nonempty, "mae"] = np.add.reduceat(abs_error, starts) / n
+    out.loc[nonempty, "rmse"] = np.sqrt(np.add.reduceat(error * error, starts) / n)
+    out.loc[nonempty, "smape"] = np.add.reduceat(abs_error / denom, starts) / n * 100
+    return out
+
+
+def concat_series(frames: dict):
+    """Flatten {feeder_id: API frame} into the (ids, forecast, actual, bounds) arrays feeder_metrics_chunk takes."""
+    ids = np.fromiter(frames, dtype=np.int64, count=len(frames))
+    lengths = np.fromiter((len(df) for df in frames.values()), dtype=np.int64, count=len(frames))
+    bounds = np.r_[0, np.cumsum(lengths)]
+    if not len(frames) or bounds[-1] == 0:
+        empty = np.empty(0, dtype=np.float64)
+        return ids, empty, empty, bounds
+    forecast = np.concatenate([df["forecast_value"].to_numpy(dtype=np.float64, na_value=np.nan) for df in frames.values()])
+    actual = np.concatenate([df["actual_value"].to_numpy(dtype=np.float64, na_value=np.nan) for df in frames.values()])
+    return ids, forecast, actual, bounds
+
+
+def top_k(table: pd.DataFrame, metric: str, k: int) -> pd.DataFrame:
+    """
+    The k feeders with the lowest `metric`, best first.
+
+    argpartition selects the k smallest in linear time; only those k are then
+    sorted. Feeders without rows are not ranked.
+    """
+    table = table[table["count"] > 0]
+    values = table[metric].to_numpy(dtype=np.float64)
+    k = min(k, len(values))
+    if k == 0:
+        return table.iloc[:0].assign(rank=pd.Series(dtype="int64"))
+    idx = np.argpartition(values, k - 1)[:k] if k < len(values) else np.arange(len(values))
+    idx = idx[np.argsort(values[idx], kind="stable")]
+    return table.iloc[idx].assign(rank=np.arange(1, k + 1))
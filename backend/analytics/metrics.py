@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+METRIC_FIELDS = (
+    "peak_load",
+    "min_load",
+    "average_load",
+    "actual_peak_load",
+    "actual_min_load",
+    "actual_average_load",
+    "mae",
+    "rmse",
+    "smape",
+)
+
+
+def compute_metrics(forecast: np.ndarray, actual: np.ndarray) -> dict:
+    """
+    Load and accuracy metrics for one forecast series.
+
+    peak_load, min_load and average_load describe forecast_value, as /metrics
+    always has. The actual_* load statistics and the errors mirror the frontend's
+    utils/metrics.ts calculateMetrics: missing actuals (NaN) fall back to the
+    forecast value, so those points count towards the actual_* statistics and
+    contribute zero error. sMAPE uses the
+    symmetric denominator (|a| + |f|) / 2, replaced by 1 where it is zero, and
+    is expressed in percent.
+    """
+    forecast = np.asarray(forecast, dtype=np.float64)
+    actual = np.asarray(actual, dtype=np.float64)
+    n = forecast.size
+    if n == 0:
+        return {"count": 0, **{field: 0.0 for field in METRIC_FIELDS}}
+
+    load = np.where(np.isnan(actual), forecast, actual)
+    error = load - forecast
+    abs_error = np.abs(error)
+    denom = (np.abs(load) + np.abs(forecast)) / 2
+    denom[denom == 0] = 1.0
+
+    return {
+        "count": int(n),
+        "peak_load": float(forecast.max()),
+        "min_load": float(forecast.min()),
+        "average_load": float(forecast.sum() / n),
+        "actual_peak_load": float(load.max()),
+        "actual_min_load": float(load.min()),
+        "actual_average_load": float(load.sum() / n),
+        "mae": float(abs_error.sum() / n),
+        "rmse": float(np.sqrt(np.dot(error, error) / n)),
+        "smape": float((abs_error / denom).sum() / n * 100),
+    }
+
+
+def compute_frame_metrics(df: pd.DataFrame) -> dict:
+    """compute_metrics over an API forecast frame (forecast_value and actual_value columns)."""
+    return compute_metrics(
+        df["forecast_value"].to_numpy(dtype=np.float64, na_value=np.nan),
+        df["actual_value"].to_numpy(dtype=np.float64, na_value=np.nan),
+    )
+
+
+def metrics_from_aggregates(aggregates: dict) -> dict:
+    """Derive compute_metrics' output from the sums returned by the ml.forecast_metrics RPC."""
+    n = int(aggregates.get("row_count") or 0)
+    if n == 0:
+        return {"count": 0, **{field: 0.0 for field in METRIC_FIELDS}}
+    return {
+        "count": n,
+        "peak_load": float(aggregates["forecast_peak_load"]),
+        "min_load": float(aggregates["forecast_min_load"]),
+        "average_load": float(aggregates["sum_forecast"]) / n,
+        "actual_peak_load": float(aggregates["peak_load"]),
+        "actual_min_load": float(aggregates["min_load"]),
+        "actual_average_load": float(aggregates["sum_load"]) / n,
+        "mae": float(aggregates["sum_abs_error"]) / n,
+        "rmse": float(np.sqrt(float(aggregates["sum_sq_error"]) / n)),
+        "smape": float(aggregates["sum_smape"]) / n * 100,
+    }
@@ -0,0 +1,202 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+import numpy as np
+import pandas as pd
+
+from analytics.metrics import metrics_from_aggregates
+from observability import timed_phase
+
+HOUR_MS = 3_600_000
+DAY_MS = 24 * HOUR_MS
+WEEK_MS = 7 * DAY_MS
+WEEK_OFFSET_MS = 4 * DAY_MS  # weeks start on Monday; 1970-01-05 was the first one
+RESOLUTIONS = {"hour": HOUR_MS, "day": DAY_MS, "week": WEEK_MS}
+
+
+def bucket_starts(epoch_ms: np.ndarray, width: int) -> np.ndarray:
+    offset = WEEK_OFFSET_MS if width == WEEK_MS else 0
+    return (epoch_ms - offset) // width * width + offset
+
+
+def aggregate_buckets(epoch_ms: np.ndarray, forecast: np.ndarray, actual: np.ndarray, width: int) -> pd.DataFrame:
+    """
+    Per-bucket aggregates of a series sorted by time, one reduceat pass per column.
+
+    Load statistics and errors use actual_value with the forecast as fallback
+    (as analytics.metrics does), so bucket sums add up to the same metrics as
+    the raw series.
+    """
+    columns = [
+        "count",
+        "forecast_min",
+        "forecast_max",
+        "forecast_sum",
+        "actual_count",
+        "actual_sum",
+        "load_min",
+        "load_max",
+        "load_sum",
+        "abs_error_sum",
+        "sq_error_sum",
+        "smape_sum",
+    ]
+    if len(epoch_ms) == 0:
+        return pd.DataFrame({c: pd.Series(dtype="float64") for c in columns}, index=pd.Index([], dtype="int64", name="bucket"))
+
+    keys = bucket_starts(epoch_ms, width)
+    first = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+
+    has_actual = ~np.isnan(actual)
+    load = np.where(has_actual, actual, forecast)
+    error = load - forecast
+    abs_error = np.abs(error)
+    denom = (np.abs(load) + np.abs(forecast)) / 2
+    denom[denom == 0] = 1.0
+
+    data = {
+        "count": np.diff(np.r_[first, len(keys)]),
+        "forecast_min": np.minimum.reduceat(forecast, first),
+        "forecast_max": np.maximum.reduceat(forecast, first),
+        "forecast_sum": np.add.reduceat(forecast, first),
+        "actual_count": np.add.reduceat(has_actual.astype(np.int64), first),
+        "actual_sum": np.add.reduceat(np.where(has_actual, actual, 0.0), first),
+        "load_min": np.minimum.reduceat(load, first),
+        "load_max": np.maximum.reduceat(load, first),
+        "load_sum": np.add.reduceat(load, first),
+        "abs_error_sum": np.add.reduceat(abs_error, first),
+        "sq_error_sum": np.add.reduceat(error * error, first),
+        "smape_sum": np.add.reduceat(abs_error / denom, first),
+    }
+    return pd.DataFrame(data, index=pd.Index(keys[first], name="bucket"))
+
+
+@timed_phase("transform")
+def rollup_series(buckets: pd.DataFrame) -> pd.DataFrame:
+    """Chart frame from rollup buckets: bucket start plus mean forecast/actual (and the forecast range)."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        actual_mean = buckets["actual_sum"].to_numpy() / buckets["actual_count"].to_numpy()
+    return pd.DataFrame(
+        {
+            "target_timestamp": buckets.index.to_numpy(dtype=np.int64),
+            "forecast_value": buckets["forecast_sum"].to_numpy() / buckets["count"].to_numpy(),
+            "actual_value": actual_mean,
+            "forecast_min": buckets["forecast_min"].to_numpy(),
+            "forecast_max": buckets["forecast_max"].to_numpy(),
+        }
+    )
+
+
+def rollup_metrics(buckets: pd.DataFrame) -> dict:
+    """analytics.metrics output for the rows covered by a set of rollup buckets."""
+    if buckets.empty:
+        return metrics_from_aggregates({"row_count": 0})
+    return metrics_from_aggregates(
+        {
+            "row_count": buckets["count"].sum(),
+            "forecast_peak_load": buckets["forecast_max"].max(),
+            "forecast_min_load": buckets["forecast_min"].min(),
+            "sum_forecast": buckets["forecast_sum"].sum(),
+            "peak_load": buckets["load_max"].max(),
+            "min_load": buckets["load_min"].min(),
+            "sum_load": buckets["load_sum"].sum(),
+            "sum_abs_error": buckets["abs_error_sum"].sum(),
+            "sum_sq_error": buckets["sq_error_sum"].sum(),
+            "sum_smape": buckets["smape_sum"].sum(),
+        }
+    )
+
+
+class RollupStore:
+    """
+    Materialized hourly/daily/weekly rollups per forecast series.
+
+    A series is built once from its full history and then maintained
+    incrementally: refresh_from() names the week boundary from which rows must
+    be re-read (the latest ingested timestamp minus `lookback_ms`, so actuals
+    that land late are picked up), and ingest() replaces only the buckets from
+    that boundary onwards. Week boundaries are also day and hour boundaries, so
+    no partially covered bucket is ever rewritten.
+
+    Series are kept in LRU order and the least recently used are dropped (and
+    rebuilt in full on their next request) whenever the buckets of all series
+    together exceed `max_bytes`. The series just ingested is always kept.
+    """
+
+    def __init__(self, refresh_seconds: float = 300.0, lookback_ms: int = 2 * DAY_MS, max_bytes: int = 64 * 1024 * 1024):
+        self.refresh_seconds = refresh_seconds
+        self.lookback_ms = lookback_ms
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.evictions = 0
+        self._series: "OrderedDict[Hashable, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def is_stale(self, key: Hashable) -> bool:
+        entry = self._series.get(key)
+        return entry is None or time.monotonic() - entry["updated_at"] > self.refresh_seconds
+
+    def refresh_from(self, key: Hashable) -> Optional[int]:
+        """Epoch ms from which rows must be re-ingested, or None if the series needs a full build."""
+        entry = self._series.get(key)
+        if entry is None or entry["watermark"] is None:
+            return None
+        return int(bucket_starts(np.int64(entry["watermark"] - self.lookback_ms), WEEK_MS))
+
+    def ingest(self, key: Hashable, df: pd.DataFrame, since_ms: Optional[int] = None):
+        """
+        Rebuild the buckets at or after `since_ms` (every bucket when None) from `df`,
+        an API frame holding all rows of the series from that point on.
+        """
+        epoch_ms = df["target_timestamp"].to_numpy(dtype=np.int64)
+        forecast = df["forecast_value"].to_numpy(dtype=np.float64, na_value=np.nan)
+        actual = df["actual_value"].to_numpy(dtype=np.float64, na_value=np.nan)
+        if since_ms is not None:
+            keep = epoch_ms >= since_ms
+            epoch_ms, forecast, actual = epoch_ms[keep], forecast[keep], actual[keep]
+
+        with self._lock:
+            previous = self._series.get(key) if since_ms is not None else None
+            tables = {}
+            for resolution, width in RESOLUTIONS.items():
+                fresh = aggregate_buckets(epoch_ms, forecast, actual, width)
+                if previous is not None:
+                    old = previous["tables"][resolution]
+                    fresh = pd.concat([old[old.index < since_ms], fresh])
+                tables[resolution] = fresh
+            watermark = previous["watermark"] if previous is not None else None
+            if len(epoch_ms):
+                watermark = max(watermark, int(epoch_ms.max())) if watermark is not None else int(epoch_ms.max())
+            self._remove(key)
+            nbytes = sum(int(table.memory_usage(index=True).sum()) for table in tables.values())
+            self._series[key] = {"tables": tables, "watermark": watermark, "updated_at": time.monotonic(), "nbytes": nbytes}
+            self.current_bytes += nbytes
+            while self.current_bytes > self.max_bytes and len(self._series) > 1:
+                self._remove(next(iter(self._series)))
+                self.evictions += 1
+
+    def _remove(self, key: Hashable):
+        entry = self._series.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry["nbytes"]
+
+    def buckets(self, key: Hashable, resolution: str, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> pd.DataFrame:
+        """Buckets overlapping [start_ms, end_ms]; edge buckets are returned whole. A series never built has none."""
+        with self._lock:
+            entry = self._series.get(key)
+            if entry is not None:
+                self._series.move_to_end(key)
+        if entry is None:
+            empty = np.empty(0)
+            return aggregate_buckets(empty.astype(np.int64), empty, empty, RESOLUTIONS[resolution])
+        table = entry["tables"][resolution]
+        index = table.index.to_numpy(dtype=np.int64)
+        lo = int(np.searchsorted(index, bucket_starts(np.int64(start_ms), RESOLUTIONS[resolution]))) if start_ms is not None else 0
+        hi = int(np.searchsorted(index, end_ms, side="right")) if end_ms is not None else len(index)
+        return table.iloc[lo:hi]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"series": len(self._series), "bytes": self.current_bytes, "max_bytes": self.max_bytes, "evictions": self.evictions}
@@ -0,0 +1,186 @@
+"""
+API benchmark: latency percentiles, throughput and peak memory per endpoint and data size.
+
+    cd backend && python -m benchmarks.bench_api --feeders 10 --years 1 3 --requests 200
+
+For every data size a fake PostgREST (benchmarks.fake_postgrest) is seeded with
+synthetic 15-minute series and the API is started against it under uvicorn, each
+in its own process. Every endpoint is then warmed up and hit `--requests` times
+from `--concurrency` client threads, cycling through the feeders. Peak RSS is
+the API process's high-water mark while that endpoint ran (Linux only).
+Pass --no-cache to measure the database path instead of the forecast cache,
+and --json to keep the results for comparing runs.
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle
+
+import httpx
+import numpy as np
+
+from benchmarks.fake_postgrest import SECRET_KEY
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENDPOINTS = {
+    "feeders": "/feeders/",
+    "forecasts": "/forecasts/{feeder_id}",
+    "metrics": "/metrics/{feeder_id}",
+}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(url: str, process: subprocess.Popen, timeout: float = 300.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"process serving {url} exited with code {process.returncode}")
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise TimeoutError(f"{url} did not come up within {timeout:.0f}s")
+
+
+def reset_peak_rss(pid: int) -> bool:
+    """Reset the VmHWM high-water mark of `pid`; False where the kernel does not allow it."""
+    try:
+        with open(f"/proc/{pid}/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb(pid: int):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def run_endpoint(client: httpx.Client, paths, requests: int, concurrency: int, warmup: int) -> dict:
+    def timed(path):
+        start = time.perf_counter()
+        response = client.get(path)
+        elapsed = time.perf_counter() - start
+        return elapsed, response.status_code, len(response.content)
+
+    for path, _ in zip(cycle(paths), range(warmup)):
+        timed(path)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        start = time.perf_counter()
+        results = list(pool.map(timed, (path for path, _ in zip(cycle(paths), range(requests)))))
+        wall = time.perf_counter() - start
+
+    latencies = np.array([r[0] for r in results]) * 1000
+    return {
+        "requests": requests,
+        "errors": sum(1 for r in results if r[1] >= 400),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "rps": requests / wall,
+        "bytes": int(np.mean([r[2] for r in results])),
+    }
+
+
+def bench_size(feeders: int, years: float, args) -> list:
+    fake_port, api_port = free_port(), free_port()
+    fake = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_postgrest", "--feeders", str(feeders), "--years", str(years), "--port", str(fake_port)],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+    )
+    env = dict(
+        os.environ,
+        SUPABASE_URL=f"http://127.0.0.1:{fake_port}",
+        SUPABASE_SECRET_KEY=SECRET_KEY,
+        STORAGE_BACKEND="supabase",
+        FORECAST_MIRROR_DIR="",
+        LOG_LEVEL="WARNING",
+    )
+    if args.no_cache:
+        env["FORECAST_CACHE_MAX_BYTES"] = "0"
+    api = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(api_port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    results = []
+    try:
+        wait_until_up(f"http://127.0.0.1:{fake_port}/rest/v1/Feeders_Metadata", fake)
+        wait_until_up(f"http://127.0.0.1:{api_port}/", api)
+        feeder_ids = range(1, feeders + 1)
+        with httpx.Client(base_url=f"http://127.0.0.1:{api_port}", timeout=args.timeout) as client:
+            for name in args.endpoints:
+                paths = [ENDPOINTS[name].format(feeder_id=feeder_id) for feeder_id in feeder_ids]
+                reset_peak_rss(api.pid)
+                stats = run_endpoint(client, paths, args.requests, args.concurrency, args.warmup)
+                stats.update(endpoint=name, feeders=feeders, years=years, rows=int(feeders * years * 365 * 96), peak_rss_mb=peak_rss_mb(api.pid))
+                results.append(stats)
+                print_row(stats)
+    finally:
+        for process in (api, fake):
+            process.terminate()
+            process.wait()
+    return results
+
+
+def print_header():
+    print(f"{'endpoint':<10} {'rows':>12} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9} {'peak RSS MB':>12} {'bytes':>11} {'errors':>7}")
+
+
+def print_row(s: dict):
+    rss = f"{s['peak_rss_mb']:.0f}" if s["peak_rss_mb"] is not None else "n/a"
+    print(
+        f"{s['endpoint']:<10} {s['rows']:>12,} {s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f} {s['p99_ms']:>9.1f} "
+        f"{s['rps']:>9.1f} {rss:>12} {s['bytes']:>11,} {s['errors']:>7}",
+        flush=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--feeders", type=int, nargs="+", default=[10])
+    parser.add_argument("--years", type=float, nargs="+", default=[1.0, 3.0], help="series lengths to benchmark")
+    parser.add_argument("--endpoints", nargs="+", choices=list(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument("--requests", type=int, default=100, help="timed requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--no-cache", action="store_true", help="disable the API's forecast cache")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    print_header()
+    results = []
+    for feeders in args.feeders:
+        for years in args.years:
+            results.extend(bench_size(feeders, years, args))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Timestamp pipeline benchmark: rows/second for the parse-then-format round trip.
+
+    cd backend && python -m benchmarks.bench_timestamps --rows 500000
+
+"before" is the original path (format-inferring pd.to_datetime followed by
+dt.strftime); "after" parses with format="ISO8601", keeps int64 epoch-ms and
+formats through encoding.encode_timestamps.
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from encoding import encode_timestamps, to_epoch_ms
+
+
+def before(raw: pd.Series) -> np.ndarray:
+    parsed = pd.to_datetime(raw)
+    return parsed.dt.strftime("%Y-%m-%dT%H:%M:%S%z").to_numpy()
+
+
+def after(raw: pd.Series) -> np.ndarray:
+    parsed = pd.to_datetime(raw, format="ISO8601", utc=True)
+    return encode_timestamps(to_epoch_ms(parsed))
+
+
+def best_of(fn, raw, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(raw)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000, help="number of 15-minute timestamps")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # PostgREST renders timestamptz as ISO 8601 with a +00:00 offset.
+    index = pd.date_range("2020-01-01", periods=args.rows, freq="15min", tz="UTC")
+    raw = pd.Series(index.strftime("%Y-%m-%dT%H:%M:%S+00:00"))
+
+    before_s, expected = best_of(before, raw, args.repeat)
+    after_s, actual = best_of(after, raw, args.repeat)
+    assert (expected == actual).all(), "encoders disagree"
+
+    print(f"rows:   {args.rows:,}")
+    print(f"before: {args.rows / before_s:>14,.0f} rows/s ({before_s * 1000:.1f} ms)")
+    print(f"after:  {args.rows / after_s:>14,.0f} rows/s ({after_s * 1000:.1f} ms)")
+    print(f"speedup: {before_s / after_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+In-memory stand-in for the Supabase PostgREST endpoints DatabaseManager uses.
+
+    cd backend && python -m benchmarks.fake_postgrest --feeders 10 --years 3 --port 54321
+
+Serves GET /rest/v1/<table> for ml.forecasts and metadata.Feeders_Metadata with
+the eq/gte/lte/gt/in/or filters, select, multi-column order, offset/limit
+paging, Prefer: count=exact|planned|estimated and the max-rows cap the real server applies,
+POST /rest/v1/<table> upserts, and POST /rest/v1/rpc/forecast_metrics and forecast_series_versions. It is seeded with a synthetic fleet from
+benchmarks.synthetic_fleet; point SUPABASE_URL at it to run the API without a
+database.
+"""
+
+import argparse
+import re
+
+import numpy as np
+import orjson
+import pandas as pd
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+from benchmarks.synthetic_fleet import forecast_chunks
+
+# Any JWT-shaped string passes supabase-py's key check; the fake does not authenticate.
+SECRET_KEY = "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.fake"
+TIMESTAMP_COLUMNS = ("target_timestamp", "forecast_run_timestamp")
+
+
+def parse_timestamp(value: str) -> pd.Timestamp:
+    # An unescaped "+" in the offset arrives as a space.
+    value = re.sub(r" (\d\d:\d\d)$", r"+\1", value)
+    ts = pd.Timestamp(value)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+class FakePostgrest:
+    """The tables behind the fake; forecasts must be sorted by feeder_id then target_timestamp."""
+
+    def __init__(self, forecasts: pd.DataFrame, feeder_ids=None, max_rows: int = 1000):
+        self.max_rows = max_rows
+        self.set_forecasts(forecasts)
+        if feeder_ids is None:
+            feeder_ids = sorted(self.feeder_slices)
+        self.feeders = pd.DataFrame({"Feeder_ID": list(feeder_ids)})
+
+    def set_forecasts(self, forecasts: pd.DataFrame):
+        self.forecasts = forecasts.reset_index(drop=True)
+        # Rendered once, the way PostgREST prints timestamptz.
+        self.rendered = {c: self.forecasts[c].dt.strftime("%Y-%m-%dT%H:%M:%S+00:00") for c in TIMESTAMP_COLUMNS}
+        ids = self.forecasts["feeder_id"].to_numpy()
+        starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]]) if len(ids) else np.array([], dtype=int)
+        self.feeder_slices = {int(ids[s]): slice(s, e) for s, e in zip(starts, np.r_[starts[1:], len(ids)])}
+
+    def condition(self, df: pd.DataFrame, column: str, op: str, value: str) -> np.ndarray:
+        values = df[column]
+        if op == "in":
+            return values.isin([int(v) if column == "feeder_id" else v for v in value.strip("()").split(",")]).to_numpy()
+        if op == "is":
+            return values.isna().to_numpy()
+        if column in TIMESTAMP_COLUMNS:
+            operand = parse_timestamp(value)
+        elif values.dtype.kind in "if":
+            operand = float(value)
+        else:
+            operand = value
+        compare = {"eq": values.eq, "gt": values.gt, "gte": values.ge, "lt": values.lt, "lte": values.le}[op]
+        return compare(operand).to_numpy()
+
+    def select(self, table: str, params) -> tuple:
+        """Rows matched by the query string (before paging) and the selected columns."""
+        if table == "Feeders_Metadata":
+            return self.feeders, list(self.feeders.columns)
+        df = self.forecasts
+        feeder = params.get("feeder_id", "")
+        if feeder.startswith("eq."):
+            df = df.iloc[self.feeder_slices.get(int(feeder[3:]), slice(0, 0))]
+        mask = np.ones(len(df), dtype=bool)
+        for key, value in params.multi_items():
+            if key in ("select", "order", "limit", "offset"):
+                continue
+            if key == "or":
+                alternatives = np.zeros(len(df), dtype=bool)
+                for term in value.strip("()").split(","):
+                    column, op, operand = term.split(".", 2)
+                    alternatives |= self.condition(df, column, op, operand)
+                mask &= alternatives
+            else:
+                op, operand = value.split(".", 1)
+                mask &= self.condition(df, key, op, operand)
+        df = df[mask] if not mask.all() else df
+
+        order = [term.split(".") for term in params.get("order", "").split(",") if term]
+        columns = [term[0] for term in order]
+        natural = columns in (["feeder_id", "target_timestamp"], ["feeder_id"]) or (
+            columns == ["target_timestamp"] and df["feeder_id"].nunique() <= 1
+        )
+        if order and not (natural and all(term[1] == "asc" for term in order)):
+            df = df.sort_values(columns, ascending=[term[1] != "desc" for term in order], kind="stable")
+
+        select = params.get("select", "*")
+        return df, list(self.forecasts.columns) if select == "*" else select.split(",")
+
+    def render(self, df: pd.DataFrame, columns: list) -> bytes:
+        out = {}
+        for column in columns:
+            if column in self.rendered and len(df):
+                out[column] = self.rendered[column].loc[df.index]
+            else:
+                out[column] = df[column]
+        return orjson.dumps(pd.DataFrame(out, index=df.index).to_dict(orient="records"))
+
+    async def table(self, request: Request) -> Response:
+        df, columns = self.select(request.path_params["table"], request.query_params)
+        total = len(df)
+        start = int(request.query_params.get("offset", 0))
+        size = int(request.query_params.get("limit", self.max_rows))
+        page = df.iloc[start : start + min(size, self.max_rows)]
+        prefer = request.headers.get("prefer", "")
+        count = total if "count=exact" in prefer else None
+        if "count=planned" in prefer or ("count=estimated" in prefer and total > self.max_rows):
+            # Planner estimates are off; this one is deliberately low so clients cannot rely on it.
+            count = int(total * 0.9)
+        elif "count=estimated" in prefer:
+            count = total
+        end = start + len(page) - 1 if len(page) else start
+        headers = {"content-range": f"{start}-{end}/{'*' if count is None else count}"}
+        return Response(self.render(page, columns), media_type="application/json", headers=headers)
+
+    async def upsert(self, request: Request) -> Response:
+        """Insert rows, replacing existing ones on the table's key (Prefer: resolution=... is not distinguished)."""
+        rows = pd.DataFrame(orjson.loads(await request.body()))
+        if request.path_params["table"] == "Feeders_Metadata":
+            self.feeders = pd.concat([self.feeders, rows], ignore_index=True).drop_duplicates("Feeder_ID").sort_values("Feeder_ID")
+        else:
+            for column in TIMESTAMP_COLUMNS:
+                rows[column] = pd.to_datetime(rows[column], format="ISO8601", utc=True)
+            key = ["feeder_id", "model_version", "tag", "target_timestamp"]
+            merged = pd.concat([self.forecasts, rows[self.forecasts.columns]], ignore_index=True)
+            self.set_forecasts(merged.drop_duplicates(key, keep="last").sort_values(["feeder_id", "target_timestamp"], kind="stable"))
+        return Response(status_code=201)
+
+    async def rpc(self, request: Request) -> Response:
+        fn = request.path_params["fn"]
+        if fn not in ("forecast_metrics", "forecast_series_versions"):
+            body = {"code": "PGRST202", "message": "Could not find the function", "details": None, "hint": None}
+            return Response(orjson.dumps(body), status_code=404, media_type="application/json")
+        p = orjson.loads(await request.body())
+        if fn == "forecast_series_versions":
+            return Response(orjson.dumps(self.series_versions(p)), media_type="application/json")
+        df = self.forecasts.iloc[self.feeder_slices.get(p["p_feeder_id"], slice(0, 0))]
+        mask = (df["model_version"] == p["p_model_version"]) & (df["tag"] == p["p_tag"])
+        for column, key in (("scenario_type", "p_scenario_type"), ("model_architecture_type", "p_model_architecture_type")):
+            if p.get(key):
+                mask &= df[column] == p[key]
+        if p.get("p_start"):
+            mask &= df["target_timestamp"] >= parse_timestamp(p["p_start"])
+        if p.get("p_end"):
+            mask &= df["target_timestamp"] <= parse_timestamp(p["p_end"])
+        df = df[mask].iloc[: p.get("p_limit") or None]
+        f = df["forecast_value"].to_numpy(dtype=float)
+        a = df["actual_value"].fillna(df["forecast_value"]).to_numpy(dtype=float)
+        scale = (np.abs(a) + np.abs(f)) / 2
+        row = {
+            "row_count": len(df),
+            "forecast_peak_load": float(f.max()) if len(f) else None,
+            "forecast_min_load": float(f.min()) if len(f) else None,
+            "sum_forecast": float(f.sum()),
+            "peak_load": float(a.max()) if len(a) else None,
+            "min_load": float(a.min()) if len(a) else None,
+            "sum_load": float(a.sum()),
+            "sum_abs_error": float(np.abs(a - f).sum()),
+            "sum_sq_error": float(((a - f) ** 2).sum()),
+            "sum_smape": float((np.abs(f - a) / np.where(scale == 0, 1, scale)).sum()),
+        }
+        return Response(orjson.dumps([row]), media_type="application/json")
+
+    def series_versions(self, p: dict) -> list:
+        rows = []
+        for feeder_id in p["p_feeder_ids"]:
+            df = self.forecasts.iloc[self.feeder_slices.get(feeder_id, slice(0, 0))]
+            mask = (df["model_version"] == p["p_model_version"]) & (df["tag"] == p["p_tag"])
+            for column, key in (("scenario_type", "p_scenario_type"), ("model_architecture_type", "p_model_architecture_type")):
+                if p.get(key):
+                    mask &= df[column] == p[key]
+            df = df[mask]
+            if len(df):
+                rows.append(
+                    {
+                        "feeder_id": feeder_id,
+                        "latest_run": df["forecast_run_timestamp"].max().strftime("%Y-%m-%dT%H:%M:%S+00:00"),
+                        "row_count": len(df),
+                        "actual_count": int(df["actual_value"].notna().sum()),
+                    }
+                )
+        return rows
+
+    def app(self) -> Starlette:
+        return Starlette(
+            routes=[
+                Route("/rest/v1/rpc/{fn}", self.rpc, methods=["POST"]),
+                Route("/rest/v1/{table}", self.table, methods=["GET"]),
+                Route("/rest/v1/{table}", self.upsert, methods=["POST"]),
+            ]
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--feeders", type=int, default=10)
+    parser.add_argument("--years", type=float, default=1.0, help="length of each 15-minute series")
+    parser.add_argument("--max-rows", type=int, default=1000, help="PostgREST max-rows cap per response")
+    parser.add_argument("--port", type=int, default=54321)
+    args = parser.parse_args()
+
+    forecasts = pd.concat(forecast_chunks(range(1, args.feeders + 1), days=args.years * 365), ignore_index=True)
+    fake = FakePostgrest(forecasts, max_rows=args.max_rows)
+    print(f"Serving {len(fake.forecasts):,} forecast rows for {args.feeders} feeders on port {args.port}", flush=True)
+    uvicorn.run(fake.app(), host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
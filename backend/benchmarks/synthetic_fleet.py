@@ -0,0 +1,176 @@
+"""
+Synthetic fleet generator: ml.forecasts and metadata.Feeders_Metadata rows at any scale.
+
+    cd backend && python -m benchmarks.synthetic_fleet --feeders 5000 --days 365 --resolution 15
+
+Each feeder gets a load series built from a two-peak daily profile, a weekday /
+weekend factor and an annual seasonal swing, scaled by a per-feeder base load.
+Forecasts add autocorrelated error noise and a small per-feeder bias; actuals
+have random outages and are missing for the latest forecast run, which has
+not been observed yet. Rows are produced in chunks of at most `--chunk-rows`,
+ordered by feeder_id then target_timestamp, and loaded into the storage
+backend the API is configured for (STORAGE_BACKEND / DUCKDB_PATH), so the full
+dataset is never held in memory.
+"""
+
+import argparse
+import time
+from typing import Iterator, Sequence
+
+import numpy as np
+import pandas as pd
+
+import config
+from db.storage_backends import FORECAST_COLUMNS, create_backend
+
+MODEL_VERSION = "v1.7_HP_Tuning_1"
+TAG = "exp_HP"
+SCENARIO_TYPE = "24hr"
+MODEL_ARCHITECTURE_TYPE = "LSTM"
+ERROR_DECAY = 0.9
+ERROR_KERNEL = ERROR_DECAY ** np.arange(64)
+
+
+class FeederProfile:
+    """Per-feeder parameters plus the generator state carried from one chunk of its series to the next."""
+
+    def __init__(self, feeder_id: int, seed: int):
+        self.feeder_id = feeder_id
+        self.rng = np.random.default_rng([seed, feeder_id])
+        self.base_load = self.rng.lognormal(np.log(150), 0.5)
+        self.evening_share = self.rng.uniform(0.3, 0.7)  # residential feeders peak in the evening
+        self.seasonal_amplitude = self.rng.uniform(0.05, 0.3)
+        self.weekend_factor = self.rng.uniform(0.8, 1.05)
+        self.bias = self.rng.normal(0, 0.01)
+        self.shocks = np.zeros(len(ERROR_KERNEL) - 1)
+
+
+def load_shape(profile: FeederProfile, index: pd.DatetimeIndex) -> np.ndarray:
+    hours = index.hour.to_numpy() + index.minute.to_numpy() / 60
+    morning = np.exp(-0.5 * ((hours - 8) / 1.5) ** 2)
+    evening = np.exp(-0.5 * ((hours - 19) / 2.0) ** 2)
+    daily = 0.55 + (1 - profile.evening_share) * morning + profile.evening_share * evening
+    weekly = np.where(index.dayofweek.to_numpy() >= 5, profile.weekend_factor, 1.0)
+    # Winter peak around mid-January, a smaller summer peak from cooling load.
+    day_of_year = index.dayofyear.to_numpy()
+    seasonal = 1 + profile.seasonal_amplitude * (np.cos(2 * np.pi * (day_of_year - 15) / 365.25) + 0.4 * np.cos(4 * np.pi * (day_of_year - 15) / 365.25))
+    return profile.base_load * daily * weekly * seasonal
+
+
+def forecast_rows(
+    profile: FeederProfile,
+    index: pd.DatetimeIndex,
+    observed_until: pd.Timestamp,
+    noise: float,
+    gap_rate: float,
+    mean_gap_steps: float,
+) -> pd.DataFrame:
+    """Rows of one feeder for `index`, continuing the feeder's error process from its previous chunk."""
+    steps = len(index)
+    rng = profile.rng
+    actual = load_shape(profile, index) * (1 + rng.normal(0, noise / 2, steps))
+
+    # Autocorrelated forecast error relative to the load: an AR(1) process with
+    # coefficient ERROR_DECAY, truncated to a finite kernel so it runs as one convolution.
+    shocks = np.concatenate([profile.shocks, rng.normal(0, noise * np.sqrt(1 - ERROR_DECAY**2), steps)])
+    error = np.convolve(shocks, ERROR_KERNEL, mode="valid")
+    profile.shocks = shocks[-(len(ERROR_KERNEL) - 1) :]
+    forecast = actual * (1 + profile.bias + error)
+
+    # Meter outages: gaps of geometric length covering about `gap_rate` of the steps.
+    outages = rng.poisson(steps * gap_rate / mean_gap_steps)
+    for start, length in zip(rng.integers(0, steps, outages), rng.geometric(1 / mean_gap_steps, outages)):
+        actual[start : start + length] = np.nan
+    actual[index > observed_until] = np.nan
+
+    return pd.DataFrame(
+        {
+            "feeder_id": profile.feeder_id,
+            "model_version": MODEL_VERSION,
+            "tag": TAG,
+            "scenario_type": SCENARIO_TYPE,
+            "model_architecture_type": MODEL_ARCHITECTURE_TYPE,
+            "forecast_run_timestamp": index.floor("D"),
+            "target_timestamp": index,
+            "forecast_value": forecast.round(3),
+            "actual_value": actual.round(3),
+        },
+        columns=list(FORECAST_COLUMNS),
+    )
+
+
+def forecast_chunks(
+    feeder_ids: Sequence[int],
+    start: str = "2021-01-01",
+    days: float = 365,
+    resolution_minutes: int = 15,
+    chunk_rows: int = 500_000,
+    noise: float = 0.04,
+    gap_rate: float = 0.02,
+    mean_gap_steps: float = 8,
+    seed: int = 0,
+) -> Iterator[pd.DataFrame]:
+    """
+    ml.forecasts rows for `feeder_ids`, `days` days from `start` at `resolution_minutes`,
+    as frames of at most `chunk_rows` rows ordered by feeder_id then target_timestamp.
+    Output is deterministic for a given seed.
+    """
+    freq = pd.Timedelta(minutes=resolution_minutes)
+    steps = int(pd.Timedelta(days=days) / freq)
+    first = pd.Timestamp(start, tz="UTC")
+    # Actuals exist up to the start of the latest forecast run.
+    observed_until = (first + (steps - 1) * freq).floor("D") - freq
+
+    pending, pending_rows = [], 0
+    for feeder_id in feeder_ids:
+        profile = FeederProfile(feeder_id, seed)
+        for offset in range(0, steps, chunk_rows):
+            index = pd.date_range(first + offset * freq, periods=min(chunk_rows, steps - offset), freq=freq)
+            rows = forecast_rows(profile, index, observed_until, noise, gap_rate, mean_gap_steps)
+            if pending_rows + len(rows) > chunk_rows and pending:
+                yield pd.concat(pending, ignore_index=True)
+                pending, pending_rows = [], 0
+            pending.append(rows)
+            pending_rows += len(rows)
+    if pending:
+        yield pd.concat(pending, ignore_index=True)
+
+
+def feeder_metadata(feeder_ids: Sequence[int]) -> pd.DataFrame:
+    """metadata.Feeders_Metadata rows for `feeder_ids`."""
+    return pd.DataFrame({"Feeder_ID": list(feeder_ids)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--feeders", type=int, default=100, help="feeder count; ids start at --first-feeder")
+    parser.add_argument("--first-feeder", type=int, default=1)
+    parser.add_argument("--start", default="2021-01-01", help="first target_timestamp (UTC)")
+    parser.add_argument("--days", type=float, default=365, help="horizon of each feeder's series")
+    parser.add_argument("--resolution", type=int, default=15, help="minutes between target timestamps")
+    parser.add_argument("--chunk-rows", type=int, default=500_000)
+    parser.add_argument("--noise", type=float, default=0.04, help="relative forecast error (standard deviation)")
+    parser.add_argument("--gap-rate", type=float, default=0.02, help="share of actual_value left empty by outages")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backend", default=config.STORAGE_BACKEND, help='"supabase" or "duckdb" (default: STORAGE_BACKEND)')
+    parser.add_argument("--duckdb-path", default=config.DUCKDB_PATH)
+    args = parser.parse_args()
+
+    feeder_ids = range(args.first_feeder, args.first_feeder + args.feeders)
+    backend = create_backend(args.backend, duckdb_path=args.duckdb_path, page_size=config.DB_PAGE_SIZE)
+    try:
+        backend.insert_feeders(feeder_metadata(feeder_ids))
+        started = time.perf_counter()
+        total = 0
+        chunks = forecast_chunks(feeder_ids, args.start, args.days, args.resolution, args.chunk_rows, args.noise, args.gap_rate, seed=args.seed)
+        for chunk in chunks:
+            backend.insert_forecasts(chunk)
+            total += len(chunk)
+            elapsed = time.perf_counter() - started
+            print(f"Loaded {total:,} forecast rows (up to feeder {chunk['feeder_id'].iloc[-1]}, {total / elapsed:,.0f} rows/s)", flush=True)
+    finally:
+        backend.close()
+
+
+if __name__ == "__main__":
+    main()
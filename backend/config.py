@@ -0,0 +1,70 @@
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Threads used to run synchronous Supabase calls off the event loop.
+DB_MAX_WORKERS = int(os.environ.get("DB_MAX_WORKERS", "8"))
+
+# Keep-alive connection pool shared by every PostgREST request in the process.
+DB_POOL_MAX_CONNECTIONS = int(os.environ.get("DB_POOL_MAX_CONNECTIONS", "20"))
+DB_POOL_MAX_KEEPALIVE = int(os.environ.get("DB_POOL_MAX_KEEPALIVE", "10"))
+DB_POOL_KEEPALIVE_EXPIRY = float(os.environ.get("DB_POOL_KEEPALIVE_EXPIRY", "30"))
+
+# Paged range() fetching; page size must not exceed the PostgREST max-rows setting.
+DB_PAGE_SIZE = int(os.environ.get("DB_PAGE_SIZE", "1000"))
+DB_PAGE_CONCURRENCY = int(os.environ.get("DB_PAGE_CONCURRENCY", "4"))
+
+# Read-through cache for API forecast series.
+FORECAST_CACHE_MAX_BYTES = int(os.environ.get("FORECAST_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+FORECAST_CACHE_TTL_SECONDS = float(os.environ.get("FORECAST_CACHE_TTL_SECONDS", "300"))
+
+# Materialized hourly/daily/weekly rollups: refresh interval, how far back each
+# incremental refresh re-reads so late-arriving actuals are folded in, and the
+# memory budget beyond which the least recently used series are dropped.
+ROLLUP_REFRESH_SECONDS = float(os.environ.get("ROLLUP_REFRESH_SECONDS", "300"))
+ROLLUP_LOOKBACK_HOURS = float(os.environ.get("ROLLUP_LOOKBACK_HOURS", "48"))
+ROLLUP_MAX_BYTES = int(os.environ.get("ROLLUP_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# /feeders/summary: how often the fleet summary is rebuilt, and how many feeders
+# are summarized at once while doing so.
+FEEDER_SUMMARY_REFRESH_SECONDS = float(os.environ.get("FEEDER_SUMMARY_REFRESH_SECONDS", "300"))
+FEEDER_SUMMARY_CONCURRENCY = int(os.environ.get("FEEDER_SUMMARY_CONCURRENCY", "16"))
+
+# Feeders per batch query when computing fleet-wide analytics (/metrics/leaderboard).
+LEADERBOARD_CHUNK_FEEDERS = int(os.environ.get("LEADERBOARD_CHUNK_FEEDERS", "50"))
+
+# /forecasts/{feeder_id}/stream: database poll interval per watched feeder, and the
+# keep-alive interval for idle streams.
+STREAM_POLL_SECONDS = float(os.environ.get("STREAM_POLL_SECONDS", "15"))
+STREAM_HEARTBEAT_SECONDS = float(os.environ.get("STREAM_HEARTBEAT_SECONDS", "20"))
+# Deltas buffered per stream client before a client that is not keeping up is disconnected (it then catches up on reconnect).
+STREAM_QUEUE_SIZE = int(os.environ.get("STREAM_QUEUE_SIZE", "32"))
+
+# Local Parquet mirror of ml.forecasts (disabled when FORECAST_MIRROR_DIR is empty) and
+# how often it is synced incrementally in the background.
+FORECAST_MIRROR_DIR = os.environ.get("FORECAST_MIRROR_DIR", "")
+FORECAST_MIRROR_SYNC_SECONDS = float(os.environ.get("FORECAST_MIRROR_SYNC_SECONDS", "300"))
+
+# Where forecasts are read from: "supabase" (SUPABASE_URL / SUPABASE_SECRET_KEY) or "duckdb",
+# an embedded database file with the same ml/metadata tables. Unset picks Supabase when
+# SUPABASE_URL is set and DuckDB otherwise.
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "")
+DUCKDB_PATH = os.environ.get("DUCKDB_PATH", "forecasts.duckdb")
+
+# Log level and format: "json" (one object per line, for log aggregation) or "text".
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json")
+
+# Server-Timing response header with the db / transform / serialize phases of each request.
+SERVER_TIMING = os.environ.get("SERVER_TIMING", "true").lower() in ("1", "true", "yes")
+
+# On-demand request profiling (see profiling.py), disabled while PROFILING_TOKEN is empty.
+# Profiles are written to PROFILE_DIR when set, otherwise returned as the response.
+PROFILING_TOKEN = os.environ.get("PROFILING_TOKEN", "")
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "")
+PROFILE_INTERVAL_SECONDS = float(os.environ.get("PROFILE_INTERVAL_SECONDS", "0.001"))
+
+# /forecasts and /metrics responses of at least this many bytes are compressed (brotli or gzip).
+COMPRESSION_MIN_BYTES = int(os.environ.get("COMPRESSION_MIN_BYTES", "1024"))
@@ -1,10 +1,10 @@
 import pickle
 from io import BytesIO
 import sys
-from typing import List, Optional
+from typing import List, Optional, Sequence
 
 # from sklearn.preprocessing import StandardScaler, MinMaxScaler
-from supabase import create_client, Client
+import httpx
 import os
 from datetime import datetime, timedelta
 
@@ -19,22 +19,47 @@ import traceback
 
 # from RLSCombiner import RLSCombiner
 import json
+import logging
+
+from observability import observe_query
+from storage_backends import StorageBackend, SupabaseBackend
+
+logger = logging.getLogger(__name__)
 
 
 class DatabaseManager:
-    def __init__(self, tag="main"):
-        url = os.environ.get("SUPABASE_URL")
-        key = os.environ.get("SUPABASE_SECRET_KEY")
-        if not url or not key:
-            raise ValueError("SUPABASE_URL and SUPABASE_SECRET_KEY must be set as environment variables")
-        self.client: Client = create_client(url, key)
+    def __init__(
+        self,
+        tag="main",
+        pool_limits: Optional[httpx.Limits] = None,
+        page_size: int = 1000,
+        page_concurrency: int = 4,
+        mirror=None,
+        backend: Optional[StorageBackend] = None,
+    ):
+        # Supabase unless another storage_backends.StorageBackend is passed in.
+        self.backend = backend or SupabaseBackend(pool_limits=pool_limits, page_size=page_size, page_concurrency=page_concurrency)
         self.ML_SCHEMA = "ml"
         self.DATA_SCHEMA = "data"
         self.METADATA_SCHEMA = "metadata"
         self.trained_models_bucket = "trained-models"
         self.rls_combiners_bucket = "rls-combiners"
         self.tag = tag  # <-- NEW: Default "main" unless overridden
+        self.mirror = mirror  # optional db.parquet_mirror.ParquetMirror serving ml.forecasts reads locally
+
+    def close(self):
+        """Release the storage backend's connections."""
+        self.backend.close()
 
+    def mirrored(self, version: str, tag: str) -> bool:
+        """Whether forecast reads for this model version and tag are served by the local mirror."""
+        return self.mirror is not None and self.mirror.has(version, tag)
+
+    def sync_mirror(self, version: str, tag: Optional[str] = None) -> int:
+        """Pull forecast rows changed since the mirror's watermark; returns the number of rows synced."""
+        return self.mirror.sync(self.backend, version, tag if tag else self.tag)
+
+    @observe_query("load_forecasts")
     def load_forecasts(
         self,
         feeder_id: int,
@@ -44,68 +69,206 @@ class DatabaseManager:
         start_timestamp: Optional[datetime] = None,
         end_timestamp: Optional[datetime] = None,
         tag: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+        limit: Optional[int] = None,
+        since: Optional[datetime] = None,
     ) -> pd.DataFrame:
         """
         Load forecast entries from ml.forecasts table based on feeder_id, version, and tag.
         Optionally filter by scenario_type, model_architecture_type, and timestamp range.
+        `columns` limits the select to those columns (target_timestamp is always fetched),
+        and `limit` caps the number of rows returned, earliest target_timestamp first.
+        `since` restricts the result to rows from a newer forecast run or with a newer
+        target_timestamp than that cursor.
         """
 
         tag = tag if tag else self.tag  # Use provided tag or default to instance tag
+        select = None
+        if columns:
+            select = ["target_timestamp"] + [c for c in columns if c != "target_timestamp"]
+
+        if self.mirrored(version, tag):
+            try:
+                df = self.mirror.read(
+                    [feeder_id], version, tag, scenario_type, model_architecture_type, start_timestamp, end_timestamp, columns, limit, since
+                )
+                if df.empty:
+                    logger.warning("No forecast data found", extra={"feeder_id": feeder_id, "tag": tag, "source": "mirror"})
+                else:
+                    logger.debug("Loaded forecast entries", extra={"feeder_id": feeder_id, "tag": tag, "rows": len(df), "source": "mirror"})
+                return df
+            except Exception:
+                logger.exception("Error reading the forecast mirror, falling back to the database", extra={"feeder_id": feeder_id})
+
         try:
-            query = (
-                self.client.schema(self.ML_SCHEMA)
-                .table("forecasts")
-                .select("*")
-                .eq("feeder_id", feeder_id)
-                .eq("model_version", version)
-                .eq("tag", tag)  # Use provided tag or default to instance tag
+            df = self.backend.select_forecasts(
+                version,
+                tag,
+                feeder_ids=[feeder_id],
+                scenario_type=scenario_type,
+                model_architecture_type=model_architecture_type,
+                start=start_timestamp,
+                end=end_timestamp,
+                since=since,
+                columns=select,
+                order=("target_timestamp",),
+                limit=limit,
             )
 
-            if scenario_type:
-                query = query.eq("scenario_type", scenario_type)
-            if model_architecture_type:
-                query = query.eq("model_architecture_type", model_architecture_type)
-            if start_timestamp:
-                query = query.gte("target_timestamp", start_timestamp)
-            if end_timestamp:
-                query = query.lte("target_timestamp", end_timestamp)
+            if df.empty:
+                logger.warning("No forecast data found", extra={"feeder_id": feeder_id, "tag": tag})
+                return pd.DataFrame()
 
-            response = query.order("target_timestamp", desc=False).execute()
+            df = df.set_index("target_timestamp")
+            logger.debug("Loaded forecast entries", extra={"feeder_id": feeder_id, "tag": tag, "rows": len(df)})
+            return df
 
-            if not response.data:
-                print("Warning: No forecast data found.")
+        except Exception:
+            logger.exception("Error loading forecasts", extra={"feeder_id": feeder_id, "tag": tag})
+            raise
+
+    @observe_query("load_forecasts_for_feeders")
+    def load_forecasts_for_feeders(
+        self,
+        feeder_ids: Sequence[int],
+        version: str,
+        scenario_type: Optional[str] = None,
+        model_architecture_type: Optional[str] = None,
+        start_timestamp: Optional[datetime] = None,
+        end_timestamp: Optional[datetime] = None,
+        tag: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Load the forecasts of several feeders with one query.
+
+        Same filters as load_forecasts, but rows come back ordered by feeder_id and
+        then target_timestamp, with feeder_id as a column and target_timestamp as
+        the index.
+        """
+
+        tag = tag if tag else self.tag
+        select = None
+        if columns:
+            select = ["feeder_id", "target_timestamp"] + [c for c in columns if c not in ("feeder_id", "target_timestamp")]
+
+        if self.mirrored(version, tag):
+            try:
+                df = self.mirror.read(
+                    sorted(feeder_ids),
+                    version,
+                    tag,
+                    scenario_type,
+                    model_architecture_type,
+                    start_timestamp,
+                    end_timestamp,
+                    ["feeder_id"] + list(columns) if columns else None,
+                )
+                logger.debug("Loaded forecast entries", extra={"feeders": len(feeder_ids), "tag": tag, "rows": len(df), "source": "mirror"})
+                return df
+            except Exception:
+                logger.exception("Error reading the forecast mirror, falling back to the database", extra={"feeders": len(feeder_ids)})
+
+        try:
+            df = self.backend.select_forecasts(
+                version,
+                tag,
+                feeder_ids=list(feeder_ids),
+                scenario_type=scenario_type,
+                model_architecture_type=model_architecture_type,
+                start=start_timestamp,
+                end=end_timestamp,
+                columns=select,
+                order=("feeder_id", "target_timestamp"),
+            )
+
+            if df.empty:
+                logger.warning("No forecast data found", extra={"feeders": len(feeder_ids), "tag": tag})
                 return pd.DataFrame()
 
-            df = pd.DataFrame(response.data)
-            df["target_timestamp"] = pd.to_datetime(df["target_timestamp"])
             df = df.set_index("target_timestamp")
-            print(f"Loaded {len(df)} forecast entries with tag '{tag}'.")
+            logger.debug("Loaded forecast entries", extra={"feeders": len(feeder_ids), "tag": tag, "rows": len(df)})
             return df
 
-        except Exception as e:
-            print(f"Error loading forecasts: {e}")
-            traceback.print_exc()
+        except Exception:
+            logger.exception("Error loading forecasts", extra={"feeders": len(feeder_ids), "tag": tag})
             raise
 
+    @observe_query("latest_forecast_timestamp")
+    def latest_forecast_timestamp(
+        self,
+        feeder_id: int,
+        version: str,
+        scenario_type: Optional[str] = None,
+        model_architecture_type: Optional[str] = None,
+        tag: Optional[str] = None,
+    ) -> Optional[pd.Timestamp]:
+        """Latest target_timestamp of a feeder's forecast series (None if it has no rows)."""
+        tag = tag if tag else self.tag
+        if self.mirrored(version, tag):
+            return self.mirror.latest_target_timestamp(feeder_id, version, tag, scenario_type, model_architecture_type)
+        return self.backend.latest_target_timestamp(feeder_id, version, tag, scenario_type, model_architecture_type)
+
+    @observe_query("series_versions")
+    def series_versions(
+        self,
+        feeder_ids: Sequence[int],
+        version: str,
+        scenario_type: Optional[str] = None,
+        model_architecture_type: Optional[str] = None,
+        tag: Optional[str] = None,
+    ) -> dict:
+        """
+        {feeder_id: (latest forecast_run_timestamp, row count, rows with an actual)} for
+        the feeders that have rows, read from wherever load_forecasts would read them.
+        The counts are None where the backend cannot provide them.
+        """
+        tag = tag if tag else self.tag
+        if self.mirrored(version, tag):
+            return self.mirror.series_versions(feeder_ids, version, tag, scenario_type, model_architecture_type)
+        return self.backend.series_versions(feeder_ids, version, tag, scenario_type, model_architecture_type)
+
+    @observe_query("forecast_aggregates")
+    def forecast_aggregates(
+        self,
+        feeder_id: int,
+        version: str,
+        scenario_type: Optional[str] = None,
+        model_architecture_type: Optional[str] = None,
+        start_timestamp: Optional[datetime] = None,
+        end_timestamp: Optional[datetime] = None,
+        tag: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> Optional[dict]:
+        """
+        Aggregate a forecast series inside the database (the ml.forecast_metrics RPC on
+        Supabase, see db/sql/forecast_metrics.sql), without downloading its rows.
+
+        Returns None when the backend cannot aggregate, so callers can fall back to
+        loading the series.
+        """
+        tag = tag if tag else self.tag
+        # Mirrored series are aggregated from the local rows instead.
+        if self.mirrored(version, tag):
+            return None
+        return self.backend.forecast_aggregates(
+            feeder_id, version, tag, scenario_type, model_architecture_type, start_timestamp, end_timestamp, limit
+        )
+
+    @observe_query("get_all_feeder_ids")
     def get_all_feeder_ids(self):
         """Fetches all Feeder_ID values from the metadata table."""
-        print("Fetching list of Feeder IDs...")
         try:
-            self.client.postgrest.schema(self.METADATA_SCHEMA)
-            response = self.client.schema(self.METADATA_SCHEMA).table("Feeders_Metadata").select("Feeder_ID").execute()
-            if response.data:
-                feeder_ids = [item["Feeder_ID"] for item in response.data]
-                print(f"Found {len(feeder_ids)} feeders: {feeder_ids}")
+            feeder_ids = self.backend.feeder_ids()
+            if feeder_ids:
+                logger.debug("Fetched feeder IDs", extra={"feeders": len(feeder_ids)})
                 return feeder_ids
             else:
-                print("Warning: No feeders found in metadata table.")
+                logger.warning("No feeders found in metadata table")
                 return []
-        except Exception as e:
-            print(f"Error fetching feeder IDs: {e}")
-            traceback.print_exc()
+        except Exception:
+            logger.exception("Error fetching feeder IDs")
             return []
-        finally:
-            self.client.postgrest.schema("public")  # Reset schema
 
 
 #     def save_scaler(self, feeder_id: int, scaler: object, version: str, purpose: str, load_type: str, scenario: str):
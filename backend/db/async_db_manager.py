@@ -0,0 +1,442 @@
+import asyncio
+import contextvars
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import partial
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from analytics.leaderboard import concat_series, feeder_metrics_chunk
+from analytics.metrics import compute_frame_metrics, compute_metrics, metrics_from_aggregates
+from analytics.rollups import RollupStore
+from db.db_manager_api import LATEST_RUN, SERIES_VERSION, DBManager, format_series_version, version_latest_run
+from db.forecast_cache import ForecastCache
+from db.single_flight import SingleFlight
+from profiling import PROFILING
+
+logger = logging.getLogger(__name__)
+
+UNBOUNDED = (None, None, None)
+
+
+def epoch_ms(ts: datetime) -> int:
+    """Epoch milliseconds for a datetime; naive values are taken as UTC, as the database does."""
+    ts = pd.Timestamp(ts)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return ts.value // 1_000_000
+
+
+def slice_window(df: pd.DataFrame, start=None, end=None, limit=None) -> pd.DataFrame:
+    """Apply a (start, end, limit) window to an API frame sorted by its int64 target_timestamp."""
+    timestamps = df["target_timestamp"].to_numpy(dtype=np.int64)
+    lo = int(np.searchsorted(timestamps, epoch_ms(start), side="left")) if start is not None else 0
+    hi = int(np.searchsorted(timestamps, epoch_ms(end), side="right")) if end is not None else len(timestamps)
+    if limit is not None:
+        hi = min(hi, lo + limit)
+    return df.iloc[lo:hi]
+
+
+class AsyncDBManager:
+    """
+    Awaitable facade over DBManager for the API routers.
+
+    The Supabase client is synchronous, so every call is handed to a bounded
+    thread pool instead of running on the event loop. max_workers caps the
+    number of PostgREST round-trips in flight per process. API series are
+    served from a read-through ForecastCache when one is supplied, and
+    concurrent identical queries share a single fetch through SingleFlight.
+    Zoomed-out views are answered from materialized RollupStore buckets.
+    """
+
+    def __init__(
+        self,
+        db: Optional[DBManager] = None,
+        max_workers: int = 8,
+        cache: Optional[ForecastCache] = None,
+        rollups: Optional[RollupStore] = None,
+        summary_refresh_seconds: float = 300.0,
+        summary_concurrency: int = 16,
+        leaderboard_chunk_size: int = 50,
+    ):
+        self.db = db if db is not None else DBManager()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+        self.cache = cache
+        self.rollups = rollups if rollups is not None else RollupStore()
+        self.flight = SingleFlight()
+        self.summary_refresh_seconds = summary_refresh_seconds
+        self.summary_concurrency = summary_concurrency
+        self._summary = None
+        self._summary_at = 0.0
+        self._background = set()
+        self.leaderboard_chunk_size = leaderboard_chunk_size
+
+    @staticmethod
+    def series_version(df: pd.DataFrame) -> Optional[str]:
+        """Version of the series `df` was loaded from (see DBManager.series_version_for_api), or None if unknown."""
+        return df.attrs.get(SERIES_VERSION)
+
+    @staticmethod
+    def series_cursor(df: pd.DataFrame) -> Optional[datetime]:
+        """
+        A `since` cursor for load_forecast_delta that picks up whatever `df` may lack:
+        the latest forecast run of its series version, or None if that is unknown.
+        """
+        version = df.attrs.get(SERIES_VERSION)
+        return pd.Timestamp(version_latest_run(version), unit="ms", tz="UTC").to_pydatetime() if version is not None else None
+
+    def _load_versioned(self, feeder_id: int, **kwargs) -> pd.DataFrame:
+        """
+        load_forecasts_for_api, tagging the frame with the series version. The version is
+        read first, so a run landing in between makes the frame newer than its version
+        (costing a client one full response), never older.
+        """
+        version = self.db.series_version_for_api(feeder_id)
+        df = self.db.load_forecasts_for_api(feeder_id, **kwargs)
+        # Empty frames are also what a failed load returns; those must not be validated later.
+        if version is not None and not df.empty:
+            df.attrs[SERIES_VERSION] = version
+        return df
+
+    def _load_batch_versioned(self, feeder_ids, **kwargs) -> dict:
+        """load_forecasts_for_api_batch, tagging each frame with its series version as _load_versioned does."""
+        versions = self.db.series_versions_for_api(feeder_ids)
+        frames = self.db.load_forecasts_for_api_batch(feeder_ids, **kwargs)
+        for feeder_id, df in frames.items():
+            if feeder_id in versions and not df.empty:
+                df.attrs[SERIES_VERSION] = versions[feeder_id]
+        return frames
+
+    def _aggregates_versioned(self, feeder_id: int, **kwargs) -> tuple:
+        """forecast_aggregates_for_api and the series version read just before it."""
+        version = self.db.series_version_for_api(feeder_id)
+        return self.db.forecast_aggregates_for_api(feeder_id, **kwargs), version
+
+    async def _run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        # The worker runs in a copy of the request's context, so its Server-Timing phases are recorded.
+        context = contextvars.copy_context()
+        profile = PROFILING.get()
+        if profile is not None:
+            # Sampled in the worker thread and merged into the request's profile.
+            fn = partial(profile.run, fn)
+        return await loop.run_in_executor(self.executor, partial(context.run, fn, *args, **kwargs))
+
+    async def load_forecasts(self, feeder_id: int, version: str, **kwargs) -> pd.DataFrame:
+        key = ("load_forecasts", feeder_id, version, tuple(sorted(kwargs.items())))
+        return await self.flight.do(key, lambda: self._run(self.db.load_forecasts, feeder_id, version, **kwargs))
+
+    async def load_forecasts_for_api(
+        self,
+        feeder_id: int,
+        columns=None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: Optional[int] = None,
+    ) -> pd.DataFrame:
+        columns = self.db.api_columns(columns)
+        window = (start, end, limit)
+        df = self._cached_series(feeder_id, columns, window)
+        if df is not None:
+            return df
+        return await self._fetch_series(feeder_id, columns, window)
+
+    def _cached_series(self, feeder_id: int, columns, window) -> Optional[pd.DataFrame]:
+        """
+        Find a cached frame that can answer this request: the exact entry, a wider
+        projection over the same window, or an unbounded series sliced in memory.
+        """
+        if self.cache is None:
+            return None
+        series = self.db.series_key(feeder_id)
+        candidates = []
+        for cols, win in ((columns, window), (self.db.API_COLUMNS, window), (columns, UNBOUNDED), (self.db.API_COLUMNS, UNBOUNDED)):
+            if (cols, win) not in candidates:
+                candidates.append((cols, win))
+        for cols, win in candidates:
+            df = self.cache.get(series + (cols,) + win, record_stats=False)
+            if df is not None:
+                self.cache.record_lookup(hit=True)
+                if win != window:
+                    df = slice_window(df, *window)
+                return df if cols == columns else df[list(columns)]
+        self.cache.record_lookup(hit=False)
+        return None
+
+    async def _fetch_series(self, feeder_id: int, columns, window) -> pd.DataFrame:
+        key = self.db.series_key(feeder_id) + (columns,) + window
+        return await self.flight.do(("load_forecasts_for_api", key), lambda: self._fetch_for_api(key, feeder_id, columns, window))
+
+    async def _fetch_for_api(self, key, feeder_id: int, columns, window) -> pd.DataFrame:
+        start, end, limit = window
+        df = await self._run(self._load_versioned, feeder_id, columns=columns, start=start, end=end, limit=limit)
+        # Empty frames are also what load_forecasts_for_api returns on errors; don't pin those.
+        if self.cache is not None and not df.empty:
+            self.cache.put(key, df)
+        return df
+
+    async def load_forecast_delta(self, feeder_id: int, since: datetime):
+        """Rows changed after the `since` cursor and the next cursor; deltas bypass the cache."""
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        key = ("load_forecast_delta",) + self.db.series_key(feeder_id) + (since,)
+        return await self.flight.do(key, lambda: self._run(self.db.load_forecast_delta_for_api, feeder_id, since))
+
+    def apply_delta(self, feeder_id: int, delta: pd.DataFrame):
+        """
+        Fold changed rows (full API width) into the cached unbounded series of a feeder,
+        and drop its narrower cached windows, which may now be out of date. The merged
+        series keeps a version only when the cached one had a version and the delta its run.
+        """
+        if self.cache is None or delta.empty:
+            return
+        series = self.db.series_key(feeder_id)
+        full_key = series + (self.db.API_COLUMNS,) + UNBOUNDED
+        full = self.cache.get(full_key, record_stats=False)
+        self.cache.invalidate(lambda key: key[: len(series)] == series)
+        if full is not None:
+            merged = pd.concat([full, delta[list(self.db.API_COLUMNS)]], ignore_index=True)
+            merged = merged.drop_duplicates("target_timestamp", keep="last").sort_values("target_timestamp", kind="stable")
+            merged = merged.reset_index(drop=True)
+            # concat drops attrs. The merged frame is the whole series, so its version is recomputed from it.
+            version, latest_run = self.series_version(full), delta.attrs.get(LATEST_RUN)
+            if version is not None and latest_run is not None:
+                latest = pd.Timestamp(max(version_latest_run(version), latest_run), unit="ms", tz="UTC")
+                counted = version.count(".") > 0
+                merged.attrs[SERIES_VERSION] = format_series_version(
+                    latest, *((len(merged), int(merged["actual_value"].notna().sum())) if counted else ())
+                )
+            self.cache.put(full_key, merged)
+
+    async def load_forecasts_for_feeders(
+        self,
+        feeder_ids,
+        columns=None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: Optional[int] = None,
+    ) -> dict:
+        """
+        API series for several feeders as {feeder_id: frame}. Cached series are
+        reused; every remaining feeder is fetched together in one batch query.
+        """
+        columns = self.db.api_columns(columns)
+        window = (start, end, limit)
+        frames = {}
+        missing = []
+        for feeder_id in dict.fromkeys(feeder_ids):
+            df = self._cached_series(feeder_id, columns, window)
+            if df is None:
+                missing.append(feeder_id)
+            else:
+                frames[feeder_id] = df
+        if missing:
+            key = ("load_forecasts_for_feeders", tuple(missing), columns) + window
+            fetched = await self.flight.do(key, lambda: self._fetch_batch(missing, columns, window))
+            frames.update(fetched)
+        return {feeder_id: frames[feeder_id] for feeder_id in dict.fromkeys(feeder_ids)}
+
+    async def _fetch_batch(self, feeder_ids, columns, window) -> dict:
+        start, end, limit = window
+        # Cached under the same keys as single-feeder reads, so the frames must carry their versions too.
+        frames = await self._run(self._load_batch_versioned, feeder_ids, columns=columns, start=start, end=end)
+        for feeder_id, df in frames.items():
+            if limit is not None:
+                df = frames[feeder_id] = df.iloc[:limit]
+            if self.cache is not None and not df.empty:
+                self.cache.put(self.db.series_key(feeder_id) + (columns,) + window, df)
+        return frames
+
+    async def load_metrics(
+        self,
+        feeder_id: int,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: Optional[int] = None,
+    ) -> dict:
+        """
+        Metrics for a feeder's API series. A cached copy of the series is used when
+        there is one; otherwise the aggregates are computed in the database, and
+        only if that RPC is unavailable are the raw rows downloaded.
+        """
+        metrics, _ = await self.load_metrics_versioned(feeder_id, start=start, end=end, limit=limit)
+        return metrics
+
+    async def load_metrics_versioned(
+        self,
+        feeder_id: int,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: Optional[int] = None,
+    ) -> tuple:
+        """load_metrics and the version of the series they were computed from (None if unknown)."""
+        columns = self.db.api_columns(["forecast_value", "actual_value"])
+        window = (start, end, limit)
+        df = self._cached_series(feeder_id, columns, window)
+        if df is not None:
+            return compute_frame_metrics(df), self.series_version(df)
+
+        key = ("forecast_aggregates",) + self.db.series_key(feeder_id) + window
+        aggregates, version = await self.flight.do(
+            key, lambda: self._run(self._aggregates_versioned, feeder_id, start=start, end=end, limit=limit)
+        )
+        if aggregates is not None:
+            return metrics_from_aggregates(aggregates), version if aggregates.get("row_count") else None
+        df = await self._fetch_series(feeder_id, columns, window)
+        return compute_frame_metrics(df), self.series_version(df)
+
+    async def load_rollups(
+        self,
+        feeder_id: int,
+        resolution: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> pd.DataFrame:
+        """Rollup buckets for a feeder's API series, refreshing them incrementally once they go stale."""
+        key = self.db.series_key(feeder_id)
+        if self.rollups.is_stale(key):
+            await self.flight.do(("refresh_rollups",) + key, lambda: self._refresh_rollups(feeder_id, key))
+        return self.rollups.buckets(
+            key,
+            resolution,
+            epoch_ms(start) if start is not None else None,
+            epoch_ms(end) if end is not None else None,
+        )
+
+    async def _refresh_rollups(self, feeder_id: int, key):
+        since = self.rollups.refresh_from(key)
+        full_key = key + (self.db.API_COLUMNS,) + UNBOUNDED
+        df = self._cached_series(feeder_id, self.db.API_COLUMNS, UNBOUNDED) if since is None else None
+        if df is None:
+            # Only the tail since the last ingested week is re-read; earlier buckets are kept.
+            start = pd.Timestamp(since, unit="ms", tz="UTC").to_pydatetime() if since is not None else None
+            try:
+                df = await self._run(self._load_versioned, feeder_id, start=start, raise_errors=True)
+            except Exception:
+                # Ingesting a failed read as "no rows" would drop buckets; keep them and retry on the next request.
+                logger.warning("Rollup refresh failed, keeping the previous buckets", extra={"feeder_id": feeder_id})
+                return
+            if since is None and self.cache is not None and not df.empty:
+                self.cache.put(full_key, df)
+        await self._run(self.rollups.ingest, key, df, since)
+
+    async def load_feeder_summary(self) -> list:
+        """
+        Summary row for every feeder, served from memory and rebuilt every
+        summary_refresh_seconds. Once a summary exists, a stale one is returned
+        while a single background task rebuilds it.
+        """
+        if self._summary is None:
+            await self.flight.do(("feeder_summary",), self._build_feeder_summary)
+        elif time.monotonic() - self._summary_at > self.summary_refresh_seconds:
+            self._spawn(self.flight.do(("feeder_summary",), self._build_feeder_summary))
+        return self._summary
+
+    def _spawn(self, coro):
+        """
+        Run `coro` in the background, keeping a reference until it is done and logging its failure.
+        It starts in a fresh context, so it neither inherits nor reports into the spawning request's state.
+        """
+        task = asyncio.create_task(coro, context=contextvars.Context())
+        self._background.add(task)
+        task.add_done_callback(self._background_done)
+        return task
+
+    def _background_done(self, task):
+        self._background.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Background task failed", exc_info=task.exception())
+
+    async def _build_feeder_summary(self):
+        feeder_ids = await self.get_all_feeder_ids()
+        semaphore = asyncio.Semaphore(self.summary_concurrency)
+
+        async def summarize(feeder_id):
+            async with semaphore:
+                return await self._summarize_feeder(feeder_id)
+
+        self._summary = list(await asyncio.gather(*(summarize(feeder_id) for feeder_id in feeder_ids)))
+        self._summary_at = time.monotonic()
+
+    async def _summarize_feeder(self, feeder_id: int) -> dict:
+        """
+        Metrics over the UTC day of a feeder's latest forecast, as the overview cards show:
+        peak and average of the forecast; errors and count only over the rows whose actuals
+        have arrived.
+        """
+        last = await self._run(self.db.latest_forecast_timestamp_for_api, feeder_id)
+        if last is None:
+            return {"feeder_id": feeder_id, "last_forecast_timestamp": None, **compute_metrics([], [])}
+        df = await self.load_forecasts_for_api(
+            feeder_id, columns=["forecast_value", "actual_value"], start=last.floor("D").to_pydatetime(), end=last.to_pydatetime()
+        )
+        forecast = compute_frame_metrics(df)
+        observed = compute_frame_metrics(df[df["actual_value"].notna()])
+        return {
+            "feeder_id": feeder_id,
+            "last_forecast_timestamp": last.to_pydatetime(),
+            "peak_load": forecast["peak_load"],
+            "average_load": forecast["average_load"],
+            # Every error metric, and the count, covers the same rows: those with actuals.
+            "mae": observed["mae"],
+            "rmse": observed["rmse"],
+            "smape": observed["smape"],
+            "count": observed["count"],
+        }
+
+    async def load_fleet_metrics(
+        self,
+        version: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> pd.DataFrame:
+        """
+        MAE/RMSE/sMAPE of every feeder in metadata.Feeders_Metadata for one model
+        version, one row per feeder. Feeders are fetched in chunks with batch
+        queries and each chunk's metrics are computed off the event loop while
+        the next chunks are still loading. Cached like a forecast series.
+
+        Raises if any chunk fails to load, rather than ranking a partial fleet.
+        """
+        version = version or self.db.MODEL_VERSION
+        key = ("fleet_metrics", version, self.db.SCENARIO_TYPE, self.db.MODEL_ARCHITECTURE_TYPE, self.db.tag, start, end)
+        if self.cache is not None:
+            table = self.cache.get(key)
+            if table is not None:
+                return table
+        return await self.flight.do(key, lambda: self._compute_fleet_metrics(key, version, start, end))
+
+    async def _compute_fleet_metrics(self, key, version, start, end) -> pd.DataFrame:
+        feeder_ids = await self.get_all_feeder_ids()
+        columns = self.db.api_columns(["forecast_value", "actual_value"])
+
+        async def chunk_metrics(chunk):
+            frames = await self._run(self.db.query_forecasts_for_api_batch, chunk, columns=columns, start=start, end=end, version=version)
+            # Plain numpy reductions: a worker process would spend more on pickling the arrays than on the math.
+            return await self._run(feeder_metrics_chunk, *concat_series(frames))
+
+        size = self.leaderboard_chunk_size
+        chunks = [feeder_ids[i : i + size] for i in range(0, len(feeder_ids), size)]
+        tables = await asyncio.gather(*(chunk_metrics(chunk) for chunk in chunks))
+        table = pd.concat(tables, ignore_index=True) if tables else feeder_metrics_chunk(*concat_series({}))
+        if self.cache is not None and (table["count"] > 0).any():
+            self.cache.put(key, table)
+        return table
+
+    async def sync_mirror(self) -> int:
+        """Bring the local forecast mirror up to date with the served model version."""
+        return await self.flight.do(("sync_mirror",), lambda: self._run(self.db.sync_mirror, self.db.MODEL_VERSION))
+
+    async def get_all_feeder_ids(self):
+        return await self.flight.do(("get_all_feeder_ids",), lambda: self._run(self.db.get_all_feeder_ids))
+
+    def cache_stats(self) -> dict:
+        return self.cache.stats() if self.cache is not None else {}
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.db.close()
@@ -1,35 +1,229 @@
 import sys
 import os
+import logging
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "")))
 from DB_Manager import DatabaseManager
+import numpy as np
 import pandas as pd
+from encoding import to_epoch_ms
+from observability import timed_phase
 from dotenv import load_dotenv, find_dotenv
 
+logger = logging.getLogger(__name__)
+
 load_dotenv()
-print("Env file found at location: ", find_dotenv())
+logger.info("Env file found", extra={"path": find_dotenv()})
+
+# Key in DataFrame.attrs holding the series version a frame was loaded at; cached frames and their slices keep it.
+SERIES_VERSION = "series_version"
+# Key in DataFrame.attrs holding the newest forecast_run_timestamp (epoch ms) among a delta frame's rows.
+LATEST_RUN = "latest_run"
+
+
+def format_series_version(latest_run: pd.Timestamp, row_count=None, actual_count=None) -> str:
+    """
+    The series version string: the latest forecast_run_timestamp in epoch ms, then the row
+    count and the number of rows with an actual, which change when rows are deleted or
+    actuals are backfilled without a new run. Counts a backend cannot provide are left out.
+    """
+    parts = [latest_run.value // 1_000_000] + [n for n in (row_count, actual_count) if n is not None]
+    return ".".join(str(int(part)) for part in parts)
+
+
+def version_latest_run(version: str) -> int:
+    """The latest forecast_run_timestamp (epoch ms) a series version was taken at."""
+    return int(version.split(".")[0])
 
 
 class DBManager(DatabaseManager):
-    def __init__(self):
-        super().__init__(tag="exp_HP")
+    MODEL_VERSION = "v1.7_HP_Tuning_1"
+    SCENARIO_TYPE = "24hr"
+    MODEL_ARCHITECTURE_TYPE = "LSTM"
+    API_COLUMNS = ("target_timestamp", "forecast_value", "actual_value")
+
+    def __init__(self, **kwargs):
+        super().__init__(tag="exp_HP", **kwargs)
+
+    def series_key(self, feeder_id):
+        """Identify the forecast series served for a feeder (used as the cache key)."""
+        return (feeder_id, self.MODEL_VERSION, self.SCENARIO_TYPE, self.MODEL_ARCHITECTURE_TYPE, self.tag)
+
+    def api_columns(self, columns=None):
+        """Normalise a requested column set to API_COLUMNS order; target_timestamp is always included."""
+        if not columns:
+            return self.API_COLUMNS
+        unknown = set(columns) - set(self.API_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown forecast columns: {sorted(unknown)}")
+        return tuple(c for c in self.API_COLUMNS if c == "target_timestamp" or c in columns)
 
-    def load_forecasts_for_api(self, feeder_id):
-        """Load forecasts for a feeder"""
+    def load_forecasts_for_api(self, feeder_id, columns=None, start=None, end=None, limit=None, raise_errors=False):
+        """
+        Load forecasts for a feeder, fetching only `columns` (defaults to API_COLUMNS) within [start, end].
+        target_timestamp is returned as int64 epoch milliseconds (UTC); see encoding.encode_timestamps.
+        Errors yield an empty frame unless `raise_errors` is set, for callers that must
+        tell a failed read from a series with no rows.
+        """
+        columns = list(self.api_columns(columns))
         try:
             df = self.load_forecasts(
                 feeder_id=feeder_id,
-                version="v1.7_HP_Tuning_1",
-                scenario_type="24hr",
-                model_architecture_type="LSTM",
-                tag="exp_HP",
+                version=self.MODEL_VERSION,
+                scenario_type=self.SCENARIO_TYPE,
+                model_architecture_type=self.MODEL_ARCHITECTURE_TYPE,
+                start_timestamp=start,
+                end_timestamp=end,
+                tag=self.tag,
+                columns=columns,
+                limit=limit,
             )
             if df.empty:
-                return pd.DataFrame(columns=["target_timestamp", "forecast_value", "actual_value"])
-            df = df.reset_index()[["target_timestamp", "forecast_value", "actual_value"]]
-            df["target_timestamp"] = df["target_timestamp"].dt.strftime("%Y-%m-%dT%H:%M:%S%z")
+                return self.empty_api_frame(columns)
+            return self.to_api_frame(df.reset_index(), columns)
+        except Exception as e:
+            # DatabaseManager has already logged the traceback.
+            logger.error("Error loading forecasts", extra={"feeder_id": feeder_id, "error": str(e)})
+            if raise_errors:
+                raise
+            return self.empty_api_frame(columns)
 
-            return df
+    def load_forecast_delta_for_api(self, feeder_id, since):
+        """
+        API rows of a feeder changed after the `since` cursor: those from a newer
+        forecast run or with a newer target_timestamp. Returns (frame, cursor),
+        where the new cursor is the latest forecast_run_timestamp seen (or `since`
+        when nothing changed); a non-empty frame carries that run in its LATEST_RUN
+        attr. Errors leave the cursor where it was.
+        """
+        columns = list(self.API_COLUMNS)
+        try:
+            df = self.load_forecasts(
+                feeder_id=feeder_id,
+                version=self.MODEL_VERSION,
+                scenario_type=self.SCENARIO_TYPE,
+                model_architecture_type=self.MODEL_ARCHITECTURE_TYPE,
+                tag=self.tag,
+                columns=columns + ["forecast_run_timestamp"],
+                since=since,
+            )
+            if df.empty:
+                return self.empty_api_frame(columns), since
+            df = df.reset_index()
+            cursor = pd.to_datetime(df["forecast_run_timestamp"], format="ISO8601", utc=True).max()
+            frame = self.to_api_frame(df, columns)
+            frame.attrs[LATEST_RUN] = cursor.value // 1_000_000
+            return frame, max(cursor.to_pydatetime(), since)
         except Exception as e:
-            print(f"Error loading forecasts for feeder {feeder_id}: {e}")
-            return pd.DataFrame(columns=["target_timestamp", "forecast_value", "actual_value"])
+            logger.error("Error loading forecast delta", extra={"feeder_id": feeder_id, "error": str(e)})
+            return self.empty_api_frame(columns), since
+
+    def load_forecasts_for_api_batch(self, feeder_ids, columns=None, start=None, end=None, version=None):
+        """
+        Load the API series of several feeders with one query, as {feeder_id: frame}.
+        `version` selects another model version (defaults to MODEL_VERSION).
+
+        Rows arrive ordered by feeder, so each feeder's frame is a slice between
+        the positions where feeder_id changes. Feeders without rows (or a failed
+        query) map to empty frames.
+        """
+        try:
+            return self.query_forecasts_for_api_batch(feeder_ids, columns=columns, start=start, end=end, version=version)
+        except Exception as e:
+            logger.error("Error loading forecasts for feeders", extra={"feeder_ids": list(feeder_ids), "error": str(e)})
+            columns = list(self.api_columns(columns))
+            return {feeder_id: self.empty_api_frame(columns) for feeder_id in feeder_ids}
+
+    def query_forecasts_for_api_batch(self, feeder_ids, columns=None, start=None, end=None, version=None):
+        """load_forecasts_for_api_batch, raising on a failed query instead of returning empty frames."""
+        columns = list(self.api_columns(columns))
+        frames = {feeder_id: self.empty_api_frame(columns) for feeder_id in feeder_ids}
+        df = self.load_forecasts_for_feeders(
+            feeder_ids=list(frames),
+            version=version or self.MODEL_VERSION,
+            scenario_type=self.SCENARIO_TYPE,
+            model_architecture_type=self.MODEL_ARCHITECTURE_TYPE,
+            start_timestamp=start,
+            end_timestamp=end,
+            tag=self.tag,
+            columns=columns,
+        )
+        if df.empty:
+            return frames
+        df = df.reset_index()
+        ids = df["feeder_id"].to_numpy(dtype=np.int64)
+        df = self.to_api_frame(df, columns)
+
+        bounds = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1], True])
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            frames[int(ids[lo])] = df.iloc[lo:hi].reset_index(drop=True)
+        return frames
+
+    def forecast_aggregates_for_api(self, feeder_id, start=None, end=None, limit=None):
+        """Database-side aggregates of the API series for a feeder (None if the RPC is unavailable or fails)"""
+        try:
+            return self.forecast_aggregates(
+                feeder_id=feeder_id,
+                version=self.MODEL_VERSION,
+                scenario_type=self.SCENARIO_TYPE,
+                model_architecture_type=self.MODEL_ARCHITECTURE_TYPE,
+                start_timestamp=start,
+                end_timestamp=end,
+                tag=self.tag,
+                limit=limit,
+            )
+        except Exception:
+            logger.exception("Error aggregating forecasts", extra={"feeder_id": feeder_id})
+            return None
+
+    def latest_forecast_timestamp_for_api(self, feeder_id):
+        """Latest target_timestamp of the API series for a feeder (None if it has none or the query fails)"""
+        try:
+            return self.latest_forecast_timestamp(
+                feeder_id=feeder_id,
+                version=self.MODEL_VERSION,
+                scenario_type=self.SCENARIO_TYPE,
+                model_architecture_type=self.MODEL_ARCHITECTURE_TYPE,
+                tag=self.tag,
+            )
+        except Exception:
+            logger.exception("Error finding the latest forecast", extra={"feeder_id": feeder_id})
+            return None
+
+    def series_versions_for_api(self, feeder_ids):
+        """
+        Versions of the API series of several feeders, read in one query, as
+        {feeder_id: version} (see format_series_version). Feeders without rows are
+        left out, and a failed query yields {}.
+        """
+        try:
+            versions = self.series_versions(
+                feeder_ids=feeder_ids,
+                version=self.MODEL_VERSION,
+                scenario_type=self.SCENARIO_TYPE,
+                model_architecture_type=self.MODEL_ARCHITECTURE_TYPE,
+                tag=self.tag,
+            )
+        except Exception:
+            logger.exception("Error reading series versions", extra={"feeders": len(feeder_ids)})
+            return {}
+        return {feeder_id: format_series_version(*parts) for feeder_id, parts in versions.items()}
+
+    def series_version_for_api(self, feeder_id):
+        """Version of the API series for a feeder (None if it has no rows or the query fails)."""
+        return self.series_versions_for_api([feeder_id]).get(feeder_id)
+
+    @staticmethod
+    @timed_phase("transform")
+    def to_api_frame(df, columns):
+        """
+        Project loaded rows onto `columns` with int64 epoch-ms target_timestamp and float64
+        values; an all-null column (e.g. actuals of the newest run) would otherwise stay object.
+        """
+        df = df[columns].astype({c: "float64" for c in columns if c != "target_timestamp"})
+        df["target_timestamp"] = to_epoch_ms(df["target_timestamp"])
+        return df
+
+    @staticmethod
+    def empty_api_frame(columns):
+        return pd.DataFrame({c: pd.Series(dtype="int64" if c == "target_timestamp" else "float64") for c in columns})
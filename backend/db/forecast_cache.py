@@ -0,0 +1,94 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+import pandas as pd
+
+
+class ForecastCache:
+    """
+    In-process LRU cache for forecast frames.
+
+    Entries expire `ttl_seconds` after they are stored, and the least recently
+    used entries are evicted whenever the summed in-memory size of all cached
+    frames exceeds `max_bytes`. Cached frames are shared between callers and
+    must be treated as read-only.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, ttl_seconds: float = 300.0):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, tuple[pd.DataFrame, int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def frame_nbytes(df: pd.DataFrame) -> int:
+        return int(df.memory_usage(index=True, deep=True).sum())
+
+    def get(self, key: Hashable, record_stats: bool = True) -> Optional[pd.DataFrame]:
+        """
+        Return the cached frame for `key`, or None if absent or expired.
+        Pass record_stats=False for speculative probes and report the outcome with record_lookup().
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] <= time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+            if record_stats:
+                self._record(entry is not None)
+            return entry[0] if entry is not None else None
+
+    def record_lookup(self, hit: bool):
+        with self._lock:
+            self._record(hit)
+
+    def _record(self, hit: bool):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def put(self, key: Hashable, df: pd.DataFrame):
+        nbytes = self.frame_nbytes(df)
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (df, nbytes, time.monotonic() + self.ttl_seconds)
+            self.current_bytes += nbytes
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, predicate=None):
+        """Drop every entry, or only those whose key satisfies `predicate`."""
+        with self._lock:
+            for key in [k for k in self._entries if predicate is None or predicate(k)]:
+                self._remove(key)
+
+    def _remove(self, key: Hashable):
+        _, nbytes, _ = self._entries.pop(key)
+        self.current_bytes -= nbytes
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,108 @@
+import asyncio
+import contextvars
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Optional, Set
+
+import numpy as np
+import pandas as pd
+
+from db.async_db_manager import AsyncDBManager
+
+logger = logging.getLogger(__name__)
+
+
+def changed_rows(current: pd.DataFrame, previous: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Rows of `current` that are new or differ from `previous` (NaN equals NaN).
+
+    Deltas always repeat the forecast horizon ahead of the cursor, so consecutive
+    polls mostly return the same rows; only the ones that changed are pushed.
+    """
+    if previous is None or previous.empty or current.empty:
+        return current
+    cur = current.set_index("target_timestamp")
+    old = previous.set_index("target_timestamp").reindex(cur.index)[cur.columns]
+    same = ((cur.to_numpy() == old.to_numpy()) | (np.isnan(cur.to_numpy()) & np.isnan(old.to_numpy()))).all(axis=1)
+    return current[~same]
+
+
+class LiveForecasts:
+    """
+    Fan-out of newly landed forecast rows to streaming clients.
+
+    Each feeder with at least one subscriber gets a single poller task that asks
+    the database for the delta since its cursor every `poll_seconds` and puts
+    the changed rows on every subscriber's queue, however many there are. The
+    poller also folds each delta into the series cache, so regular requests for
+    a watched feeder keep hitting warm entries. It stops with its last subscriber.
+
+    Queues hold at most `queue_size` deltas. A subscriber that falls that far
+    behind is dropped: its queue is emptied and ends with None, upon which the
+    stream closes and the client reconnects and catches up from its last cursor.
+    """
+
+    def __init__(self, db: AsyncDBManager, poll_seconds: float = 15.0, queue_size: int = 32):
+        self.db = db
+        self.poll_seconds = poll_seconds
+        self.queue_size = queue_size
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+        self._pollers: Dict[int, asyncio.Task] = {}
+
+    def subscribe(self, feeder_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(feeder_id, set()).add(queue)
+        if feeder_id not in self._pollers:
+            # A fresh context: the poller outlives the request that started it.
+            self._pollers[feeder_id] = asyncio.create_task(self._poll(feeder_id), context=contextvars.Context())
+        return queue
+
+    def unsubscribe(self, feeder_id: int, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(feeder_id)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[feeder_id]
+            poller = self._pollers.pop(feeder_id, None)
+            if poller is not None:
+                poller.cancel()
+
+    async def _poll(self, feeder_id: int):
+        # Baseline: rows already visible now are what subscribers fetched (or catch up on) themselves.
+        cursor = datetime.now(timezone.utc)
+        previous, cursor = await self.db.load_forecast_delta(feeder_id, cursor)
+        await self.db.load_forecasts_for_api(feeder_id)
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            try:
+                delta, next_cursor = await self.db.load_forecast_delta(feeder_id, cursor)
+            except Exception:
+                logger.exception("Error polling forecasts", extra={"feeder_id": feeder_id})
+                continue
+            changed = changed_rows(delta, previous)
+            previous, cursor = delta, next_cursor
+            if changed.empty:
+                continue
+            self.db.apply_delta(feeder_id, changed)
+            self._publish(feeder_id, changed, cursor)
+
+    def _publish(self, feeder_id: int, changed: pd.DataFrame, cursor: datetime):
+        for queue in list(self._subscribers.get(feeder_id, ())):
+            try:
+                queue.put_nowait((changed, cursor))
+            except asyncio.QueueFull:
+                logger.warning("Stream subscriber fell behind, closing its stream", extra={"feeder_id": feeder_id})
+                self.unsubscribe(feeder_id, queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    def stats(self) -> dict:
+        return {"feeders": len(self._pollers), "subscribers": sum(len(s) for s in self._subscribers.values())}
+
+    def close(self):
+        for poller in self._pollers.values():
+            poller.cancel()
+        self._pollers.clear()
+        self._subscribers.clear()
@@ -0,0 +1,281 @@
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Optional, Sequence
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # the mirror is optional
+    pa = ds = pq = None
+
+logger = logging.getLogger(__name__)
+
+# Columns kept in the mirror; feeder_id, tag and model_version live in the partition path.
+MIRROR_COLUMNS = ("target_timestamp", "forecast_run_timestamp", "forecast_value", "actual_value", "scenario_type", "model_architecture_type")
+PARTITION_FILE = "data.parquet"
+WATERMARK_FILE = "_watermark.json"
+
+
+def mirror_schema():
+    ts = pa.timestamp("us", tz="UTC")
+    return pa.schema(
+        [
+            ("target_timestamp", ts),
+            ("forecast_run_timestamp", ts),
+            ("forecast_value", pa.float64()),
+            ("actual_value", pa.float64()),
+            ("scenario_type", pa.string()),
+            ("model_architecture_type", pa.string()),
+        ]
+    )
+
+
+def utc_timestamp(ts) -> pd.Timestamp:
+    """A datetime as a UTC Timestamp; naive values are taken as UTC, as the database does."""
+    ts = pd.Timestamp(ts)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+def utc_scalar(ts) -> "pa.Scalar":
+    return pa.scalar(utc_timestamp(ts), type=pa.timestamp("us", tz="UTC"))
+
+
+class ParquetMirror:
+    """
+    Local copy of ml.forecasts as Parquet files, one file per feeder and month:
+
+        <root>/tag=<tag>/model_version=<version>/feeder_id=<id>/month=<YYYY-MM>/data.parquet
+
+    sync() pulls every row whose forecast_run_timestamp is at or after the stored
+    watermark and upserts it into its partition on (feeder_id, target_timestamp),
+    the same key the forecasts table is upserted on. The first sync copies the
+    whole history of the feeders in metadata.Feeders_Metadata, `page_feeders`
+    feeders per query, writing each page before fetching the next. read() prunes
+    partitions by feeder and month, and rows and columns inside the files through
+    Arrow's dataset filters. Files are replaced atomically, so reads running
+    alongside a sync see either the old or the new partition.
+    """
+
+    def __init__(self, root: str, page_feeders: int = 50):
+        if pa is None:
+            raise RuntimeError("pyarrow is required for the Parquet forecast mirror")
+        self.root = root
+        self.page_feeders = page_feeders
+
+    def _series_dir(self, version: str, tag: str) -> str:
+        return os.path.join(self.root, f"tag={tag}", f"model_version={version}")
+
+    def _feeder_dir(self, version: str, tag: str, feeder_id: int) -> str:
+        return os.path.join(self._series_dir(version, tag), f"feeder_id={feeder_id}")
+
+    def _state(self, version: str, tag: str) -> Optional[dict]:
+        path = os.path.join(self._series_dir(version, tag), WATERMARK_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def watermark(self, version: str, tag: str) -> Optional[datetime]:
+        """Latest forecast_run_timestamp synced for this model version and tag (None if nothing is mirrored)."""
+        state = self._state(version, tag)
+        value = state and state["forecast_run_timestamp"]
+        return datetime.fromisoformat(value) if value else None
+
+    def has(self, version: str, tag: str) -> bool:
+        """Whether this model version and tag have been synced at least once."""
+        return self._state(version, tag) is not None
+
+    def _write_watermark(self, version: str, tag: str, watermark: Optional[datetime]):
+        directory = self._series_dir(version, tag)
+        os.makedirs(directory, exist_ok=True)
+        body = {
+            "forecast_run_timestamp": watermark.isoformat() if watermark is not None else None,
+            "synced_at": datetime.now(timezone.utc).isoformat(),
+        }
+        tmp = os.path.join(directory, WATERMARK_FILE + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(body, f)
+        os.replace(tmp, os.path.join(directory, WATERMARK_FILE))
+
+    def sync(self, backend, version: str, tag: str) -> int:
+        """
+        Copy rows of `version`/`tag` changed since the watermark from `backend` (a
+        db.storage_backends.StorageBackend) into the mirror. Returns the number of rows fetched.
+        """
+        watermark = self.watermark(version, tag)
+        order = ("forecast_run_timestamp", "feeder_id", "target_timestamp")
+        if watermark is None:
+            # The whole history: only one page of feeders is held in memory at a time.
+            feeder_ids = backend.feeder_ids()
+            pages = (
+                backend.select_forecasts(version, tag, feeder_ids=feeder_ids[i : i + self.page_feeders], order=order)
+                for i in range(0, len(feeder_ids), self.page_feeders)
+            )
+        else:
+            # At-or-after: rows sharing the watermark's run timestamp may have landed after the last sync.
+            pages = [backend.select_forecasts(version, tag, min_run_timestamp=watermark, order=order)]
+
+        rows = 0
+        for df in pages:
+            if df.empty:
+                continue
+            self._write_rows(version, tag, df)
+            rows += len(df)
+            latest = df["forecast_run_timestamp"].max().to_pydatetime()
+            watermark = latest if watermark is None else max(watermark, latest)
+
+        # Written last, so an interrupted first sync starts over instead of leaving feeders out.
+        self._write_watermark(version, tag, watermark)
+        if rows:
+            logger.info("Synced forecast rows into the local mirror", extra={"rows": rows, "tag": tag, "model_version": version})
+        return rows
+
+    def _write_rows(self, version: str, tag: str, df: pd.DataFrame):
+        for column in MIRROR_COLUMNS:
+            if column not in df.columns:
+                df[column] = None
+        df["month"] = df["target_timestamp"].dt.strftime("%Y-%m")
+        for (feeder_id, month), part in df.groupby(["feeder_id", "month"], sort=False):
+            self._upsert_partition(version, tag, int(feeder_id), month, part[list(MIRROR_COLUMNS)])
+
+    def _upsert_partition(self, version: str, tag: str, feeder_id: int, month: str, rows: pd.DataFrame):
+        directory = os.path.join(self._feeder_dir(version, tag, feeder_id), f"month={month}")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, PARTITION_FILE)
+        new = pa.Table.from_pandas(rows, schema=mirror_schema(), preserve_index=False).to_pandas()
+        if os.path.exists(path):
+            new = pd.concat([pq.read_table(path).to_pandas(), new], ignore_index=True)
+        new = new.drop_duplicates("target_timestamp", keep="last").sort_values("target_timestamp", kind="stable")
+        table = pa.Table.from_pandas(new, schema=mirror_schema(), preserve_index=False)
+        tmp = path + ".tmp"
+        pq.write_table(table, tmp)
+        os.replace(tmp, path)
+
+    def _partition_files(self, version, tag, feeder_id, start=None, end=None) -> list:
+        """Partition files of a feeder whose month overlaps [start, end]."""
+        directory = self._feeder_dir(version, tag, feeder_id)
+        if not os.path.isdir(directory):
+            return []
+        first = utc_timestamp(start).strftime("%Y-%m") if start is not None else None
+        last = utc_timestamp(end).strftime("%Y-%m") if end is not None else None
+        files = []
+        for name in sorted(os.listdir(directory)):
+            month = name.partition("=")[2]
+            if (first is None or month >= first) and (last is None or month <= last):
+                path = os.path.join(directory, name, PARTITION_FILE)
+                if os.path.exists(path):
+                    files.append(path)
+        return files
+
+    @staticmethod
+    def _filter(scenario_type=None, model_architecture_type=None, start=None, end=None, since=None):
+        conditions = []
+        if scenario_type:
+            conditions.append(ds.field("scenario_type") == scenario_type)
+        if model_architecture_type:
+            conditions.append(ds.field("model_architecture_type") == model_architecture_type)
+        if start is not None:
+            conditions.append(ds.field("target_timestamp") >= utc_scalar(start))
+        if end is not None:
+            conditions.append(ds.field("target_timestamp") <= utc_scalar(end))
+        if since is not None:
+            conditions.append((ds.field("forecast_run_timestamp") > utc_scalar(since)) | (ds.field("target_timestamp") > utc_scalar(since)))
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return expression
+
+    def read(
+        self,
+        feeder_ids: Sequence[int],
+        version: str,
+        tag: str,
+        scenario_type: Optional[str] = None,
+        model_architecture_type: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        columns: Optional[Sequence[str]] = None,
+        limit: Optional[int] = None,
+        since: Optional[datetime] = None,
+    ) -> pd.DataFrame:
+        """
+        Rows of the given feeders in the shape DatabaseManager.load_forecasts returns:
+        target_timestamp as a UTC index, ordered by feeder_id then target_timestamp,
+        at most `limit` rows per feeder. Only `columns` are read from the files.
+        """
+        if columns:
+            wanted = [c for c in columns if c != "target_timestamp"]
+            read_columns = ["target_timestamp"] + [c for c in wanted if c in MIRROR_COLUMNS]
+        else:
+            wanted = None
+            read_columns = list(MIRROR_COLUMNS)
+        expression = self._filter(scenario_type, model_architecture_type, start, end, since)
+
+        frames = []
+        for feeder_id in feeder_ids:
+            files = self._partition_files(version, tag, feeder_id, start, end)
+            if not files:
+                continue
+            table = ds.dataset(files, schema=mirror_schema(), format="parquet").to_table(columns=read_columns, filter=expression)
+            if table.num_rows == 0:
+                continue
+            df = table.to_pandas().sort_values("target_timestamp", kind="stable")
+            if limit:
+                df = df.iloc[:limit]
+            df["feeder_id"] = feeder_id
+            if wanted is None:
+                df["model_version"] = version
+                df["tag"] = tag
+            frames.append(df)
+
+        if not frames:
+            return pd.DataFrame()
+        df = pd.concat(frames, ignore_index=True).set_index("target_timestamp")
+        if wanted is not None:
+            df = df[[c for c in wanted if c in df.columns]]
+        return df
+
+    def latest_target_timestamp(
+        self,
+        feeder_id: int,
+        version: str,
+        tag: str,
+        scenario_type: Optional[str] = None,
+        model_architecture_type: Optional[str] = None,
+    ) -> Optional[pd.Timestamp]:
+        """Latest target_timestamp of a feeder, scanning month partitions from the newest back."""
+        expression = self._filter(scenario_type, model_architecture_type)
+        for path in reversed(self._partition_files(version, tag, feeder_id)):
+            column = ds.dataset(path, schema=mirror_schema(), format="parquet").to_table(columns=["target_timestamp"], filter=expression)
+            if column.num_rows:
+                return pd.Timestamp(column.column(0).to_pandas().max())
+        return None
+
+    def series_versions(
+        self,
+        feeder_ids: Sequence[int],
+        version: str,
+        tag: str,
+        scenario_type: Optional[str] = None,
+        model_architecture_type: Optional[str] = None,
+    ) -> dict:
+        """Latest forecast_run_timestamp, row count and actual count of each mirrored feeder with rows."""
+        expression = self._filter(scenario_type, model_architecture_type)
+        versions = {}
+        for feeder_id in feeder_ids:
+            files = self._partition_files(version, tag, feeder_id)
+            if not files:
+                continue
+            table = ds.dataset(files, schema=mirror_schema(), format="parquet").to_table(
+                columns=["forecast_run_timestamp", "actual_value"], filter=expression
+            )
+            if table.num_rows == 0:
+                continue
+            latest = utc_timestamp(table.column("forecast_run_timestamp").to_pandas().max())
+            versions[feeder_id] = (latest, table.num_rows, table.num_rows - table.column("actual_value").null_count)
+        return versions
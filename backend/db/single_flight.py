@@ -0,0 +1,60 @@
+import asyncio
+import contextvars
+from typing import Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+from observability import REQUEST_TIMINGS, RequestTimings
+from profiling import PROFILING
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key onto one in-flight task.
+
+    The first caller for a key starts the work; callers that arrive while it is
+    still running await the same task and receive its result (or exception).
+    The key is released as soon as the task finishes, so later calls fetch again.
+
+    The task belongs to no single request, so it runs in a fresh context with
+    its own RequestTimings, which every caller adds to its Server-Timing once
+    the task is done. A profiled request neither starts nor joins shared work;
+    it runs `fn` itself so that its profile shows exactly that work.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, Tuple[asyncio.Task, RequestTimings]] = {}
+        self.started = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        if PROFILING.get() is not None:
+            return await fn()
+        call = self._calls.get(key)
+        if call is None:
+            timings = RequestTimings()
+            context = contextvars.Context()
+            context.run(REQUEST_TIMINGS.set, timings)
+            task = asyncio.get_running_loop().create_task(context.run(fn), context=context)
+            call = self._calls[key] = (task, timings)
+            task.add_done_callback(lambda t: self._release(key, t))
+            self.started += 1
+        else:
+            self.shared += 1
+        task, timings = call
+        try:
+            # Shield so one caller going away does not cancel the fetch for everyone else.
+            return await asyncio.shield(task)
+        finally:
+            request_timings = REQUEST_TIMINGS.get()
+            if request_timings is not None and task.done():
+                request_timings.merge(timings)
+
+    def _release(self, key: Hashable, task: asyncio.Task):
+        if key in self._calls and self._calls[key][0] is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # mark as retrieved even if every waiter was cancelled
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._calls), "started": self.started, "shared": self.shared}
@@ -0,0 +1,26 @@
+-- Tables for the embedded DuckDB storage backend (storage_backends.DuckDBBackend).
+--
+-- Same schemas, table and column names as the Supabase database, restricted to
+-- the columns the API reads. Applied on every start; existing tables are kept.
+
+create schema if not exists ml;
+create schema if not exists metadata;
+
+create table if not exists ml.forecasts (
+    feeder_id integer not null,
+    model_version varchar not null,
+    tag varchar not null,
+    scenario_type varchar,
+    model_architecture_type varchar,
+    forecast_run_timestamp timestamptz,
+    target_timestamp timestamptz not null,
+    forecast_value double,
+    actual_value double
+);
+
+-- The natural key Supabase upserts on; also the conflict target of DuckDBBackend.insert_forecasts.
+create unique index if not exists forecasts_natural_key on ml.forecasts (feeder_id, model_version, tag, target_timestamp);
+
+create table if not exists metadata."Feeders_Metadata" (
+    "Feeder_ID" integer primary key
+);
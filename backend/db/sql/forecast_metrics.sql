@@ -0,0 +1,67 @@
+-- Aggregate pushdown for GET /metrics/{feeder_id} (DatabaseManager.forecast_aggregates).
+--
+-- Returns the sums needed to derive peak/min/average load, MAE, RMSE and sMAPE
+-- for one forecast series without shipping its rows to the API. The forecast_*
+-- and sum_forecast columns describe forecast_value; the others use actual_value
+-- falling back to forecast_value, matching analytics.metrics.
+-- Apply once per database, e.g. in the Supabase SQL editor; ml must be an
+-- exposed schema for PostgREST to route /rpc/forecast_metrics. The drop is
+-- needed when upgrading from the version without the forecast_* columns.
+
+drop function if exists ml.forecast_metrics(integer, text, text, text, text, timestamptz, timestamptz, integer);
+
+create or replace function ml.forecast_metrics(
+    p_feeder_id integer,
+    p_model_version text,
+    p_tag text,
+    p_scenario_type text default null,
+    p_model_architecture_type text default null,
+    p_start timestamptz default null,
+    p_end timestamptz default null,
+    p_limit integer default null
+)
+returns table (
+    row_count bigint,
+    forecast_peak_load double precision,
+    forecast_min_load double precision,
+    sum_forecast double precision,
+    peak_load double precision,
+    min_load double precision,
+    sum_load double precision,
+    sum_abs_error double precision,
+    sum_sq_error double precision,
+    sum_smape double precision
+)
+language sql
+stable
+as $$
+    with series as (
+        select
+            forecast_value::float8 as f,
+            coalesce(actual_value, forecast_value)::float8 as a
+        from ml.forecasts
+        where feeder_id = p_feeder_id
+          and model_version = p_model_version
+          and tag = p_tag
+          and (p_scenario_type is null or scenario_type = p_scenario_type)
+          and (p_model_architecture_type is null or model_architecture_type = p_model_architecture_type)
+          and (p_start is null or target_timestamp >= p_start)
+          and (p_end is null or target_timestamp <= p_end)
+        order by target_timestamp
+        limit p_limit
+    )
+    select
+        count(*),
+        max(f),
+        min(f),
+        sum(f),
+        max(a),
+        min(a),
+        sum(a),
+        sum(abs(a - f)),
+        sum((a - f) * (a - f)),
+        sum(abs(f - a) / coalesce(nullif((abs(a) + abs(f)) / 2, 0), 1))
+    from series;
+$$;
+
+grant execute on function ml.forecast_metrics to anon, authenticated, service_role;
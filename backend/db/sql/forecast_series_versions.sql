@@ -0,0 +1,41 @@
+-- Series versions for ETags and cache validation (DatabaseManager.series_versions).
+--
+-- One row per feeder with rows: the latest forecast_run_timestamp, the row
+-- count and the number of rows with an actual_value. A new run moves the first,
+-- deleted or late-inserted rows change the second and backfilled actuals the
+-- third, so the version changes whenever the served series does. Answering for
+-- many feeders at once keeps batch requests to a single round trip.
+-- Apply once per database, e.g. in the Supabase SQL editor; ml must be an
+-- exposed schema for PostgREST to route /rpc/forecast_series_versions.
+
+create or replace function ml.forecast_series_versions(
+    p_feeder_ids integer[],
+    p_model_version text,
+    p_tag text,
+    p_scenario_type text default null,
+    p_model_architecture_type text default null
+)
+returns table (
+    feeder_id integer,
+    latest_run timestamptz,
+    row_count bigint,
+    actual_count bigint
+)
+language sql
+stable
+as $$
+    select
+        f.feeder_id,
+        max(f.forecast_run_timestamp),
+        count(*),
+        count(f.actual_value)
+    from ml.forecasts f
+    where f.feeder_id = any(p_feeder_ids)
+      and f.model_version = p_model_version
+      and f.tag = p_tag
+      and (p_scenario_type is null or f.scenario_type = p_scenario_type)
+      and (p_model_architecture_type is null or f.model_architecture_type = p_model_architecture_type)
+    group by f.feeder_id;
+$$;
+
+grant execute on function ml.forecast_series_versions to anon, authenticated, service_role;
@@ -0,0 +1,591 @@
+import abc
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Optional, Sequence
+
+import httpx
+import pandas as pd
+from postgrest import SyncPostgrestClient
+from postgrest.exceptions import APIError
+from postgrest.types import ReturnMethod
+from postgrest.utils import SyncClient
+from supabase import Client, create_client
+
+try:
+    import duckdb
+except ImportError:  # only needed for the embedded backend
+    duckdb = None
+
+logger = logging.getLogger(__name__)
+
+ML_SCHEMA = "ml"
+METADATA_SCHEMA = "metadata"
+FORECAST_COLUMNS = (
+    "feeder_id",
+    "model_version",
+    "tag",
+    "scenario_type",
+    "model_architecture_type",
+    "forecast_run_timestamp",
+    "target_timestamp",
+    "forecast_value",
+    "actual_value",
+)
+TIMESTAMP_COLUMNS = ("target_timestamp", "forecast_run_timestamp")
+
+
+class StorageBackend(abc.ABC):
+    """
+    Where DatabaseManager reads ml.forecasts and metadata.Feeders_Metadata from.
+
+    Forecast rows come back as a DataFrame with one column per selected column and
+    the timestamp columns as UTC datetimes (an empty DataFrame when nothing matches).
+    """
+
+    @abc.abstractmethod
+    def select_forecasts(
+        self,
+        version: str,
+        tag: str,
+        feeder_ids: Optional[Sequence[int]] = None,
+        scenario_type: Optional[str] = None,
+        model_architecture_type: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        since: Optional[datetime] = None,
+        min_run_timestamp: Optional[datetime] = None,
+        columns: Optional[Sequence[str]] = None,
+        order: Sequence[str] = ("feeder_id", "target_timestamp"),
+        limit: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Forecast rows of one model version and tag, optionally restricted to some feeders, a
+        target_timestamp range, rows changed after `since` (a newer forecast run or a newer
+        target_timestamp) or runs at or after `min_run_timestamp`. Ascending by `order`.
+        """
+
+    @abc.abstractmethod
+    def latest_target_timestamp(
+        self,
+        feeder_id: int,
+        version: str,
+        tag: str,
+        scenario_type: Optional[str] = None,
+        model_architecture_type: Optional[str] = None,
+    ) -> Optional[pd.Timestamp]:
+        """The latest target_timestamp of a feeder's series, or None if it has no rows."""
+
+    @abc.abstractmethod
+    def series_versions(
+        self,
+        feeder_ids: Sequence[int],
+        version: str,
+        tag: str,
+        scenario_type: Optional[str] = None,
+        model_architecture_type: Optional[str] = None,
+    ) -> dict:
+        """
+        {feeder_id: (latest forecast_run_timestamp, row count, rows with an actual_value)}
+        for the feeders that have rows. The counts are None when the backend cannot
+        provide them cheaply.
+        """
+
+    def forecast_aggregates(
+        self,
+        feeder_id: int,
+        version: str,
+        tag: str,
+        scenario_type: Optional[str] = None,
+        model_architecture_type: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: Optional[int] = None,
+    ) -> Optional[dict]:
+        """The sums returned by ml.forecast_metrics (see db/sql/forecast_metrics.sql), or None if unsupported."""
+        return None
+
+    @abc.abstractmethod
+    def feeder_ids(self) -> list:
+        """Every Feeder_ID in metadata.Feeders_Metadata."""
+
+    @abc.abstractmethod
+    def insert_forecasts(self, rows: pd.DataFrame):
+        """
+        Write ml.forecasts rows (FORECAST_COLUMNS, timestamps as UTC datetimes). Rows
+        replace any existing row with the same feeder_id, model_version, tag and
+        target_timestamp.
+        """
+
+    @abc.abstractmethod
+    def insert_feeders(self, rows: pd.DataFrame):
+        """Write metadata.Feeders_Metadata rows, skipping feeders that already exist."""
+
+    def close(self):
+        pass
+
+
+def rows_to_frame(rows: list) -> pd.DataFrame:
+    df = pd.DataFrame(rows)
+    for column in TIMESTAMP_COLUMNS:
+        if column in df.columns:
+            # PostgREST always returns ISO 8601; naming the format skips per-row format inference.
+            df[column] = pd.to_datetime(df[column], format="ISO8601", utc=True)
+    return df
+
+
+class PooledPostgrestClient(SyncPostgrestClient):
+    """PostgREST client whose HTTP session uses an explicit keep-alive connection pool."""
+
+    def __init__(self, base_url: str, *, limits: httpx.Limits, **kwargs):
+        self.limits = limits
+        super().__init__(base_url, **kwargs)
+
+    def create_session(self, base_url, headers, timeout, verify=True, proxy=None) -> SyncClient:
+        return SyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            verify=verify,
+            proxy=proxy,
+            follow_redirects=True,
+            http2=True,
+            limits=self.limits,
+        )
+
+
+class SupabaseBackend(StorageBackend):
+    """Reads through Supabase's PostgREST API (SUPABASE_URL / SUPABASE_SECRET_KEY)."""
+
+    def __init__(self, pool_limits: Optional[httpx.Limits] = None, page_size: int = 1000, page_concurrency: int = 4):
+        url = os.environ.get("SUPABASE_URL")
+        key = os.environ.get("SUPABASE_SECRET_KEY")
+        if not url or not key:
+            raise ValueError("SUPABASE_URL and SUPABASE_SECRET_KEY must be set as environment variables")
+        self.client: Client = create_client(url, key)
+        self.pool_limits = pool_limits or httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30.0)
+        self._schema_clients = {}
+        self.page_size = page_size
+        self.aggregates_available = True
+        self.versions_available = True
+        self.page_concurrency = page_concurrency
+        self._page_executor = ThreadPoolExecutor(max_workers=page_concurrency, thread_name_prefix="db-page")
+
+    def schema(self, schema: str) -> SyncPostgrestClient:
+        """
+        Return a PostgREST client bound to `schema`, reusing its connection pool.
+
+        Client.schema() builds a fresh HTTP session on every call, so the
+        per-schema clients are created once and kept for the backend's lifetime.
+        """
+        if schema not in self._schema_clients:
+            self._schema_clients[schema] = PooledPostgrestClient(
+                self.client.rest_url,
+                schema=schema,
+                headers=self.client.options.headers,
+                timeout=self.client.options.postgrest_client_timeout,
+                limits=self.pool_limits,
+            )
+        return self._schema_clients[schema]
+
+    def close(self):
+        """Close the pooled HTTP sessions."""
+        self._page_executor.shutdown(wait=False, cancel_futures=True)
+        for client in self._schema_clients.values():
+            client.aclose()
+        self._schema_clients.clear()
+
+    def fetch_all_rows(self, build_query: Callable, limit: Optional[int] = None) -> list:
+        """
+        Fetch every row matched by a query (at most `limit`) in range() pages.
+
+        PostgREST silently truncates a response at its max-rows setting, so the
+        first page is requested with an estimated count, which PostgREST makes
+        exact up to max-rows and takes from the query planner beyond that, so
+        large series are sized without a COUNT(*) scan. The pages the estimate
+        covers are fetched concurrently on the page executor; while the last
+        page still comes back full, further batches of pages follow.
+
+        `build_query(count)` must return a fresh query builder with a
+        deterministic order, passing `count` through to select().
+        """
+        first_size = min(self.page_size, limit) if limit else self.page_size
+        first = build_query(count="estimated").range(0, first_size - 1).execute()
+        rows = first.data or []
+        estimate = first.count if first.count is not None else len(rows)
+        if limit:
+            estimate = min(estimate, limit)
+        # A short first page with an estimate it already covers is the whole result (counts that small are exact).
+        if not rows or len(rows) == limit or estimate <= len(rows) < first_size:
+            return rows
+
+        # The server may cap pages below page_size; continue with the page size it actually honoured.
+        step = len(rows)
+        all_rows = list(rows)
+
+        def fetch_page(start, stop):
+            return stop - start, build_query(count=None).range(start, stop - 1).execute().data or []
+
+        start = step
+        end = max(estimate, start + step)
+        while True:
+            if limit:
+                end = min(end, limit)
+            if start >= end:
+                break
+            starts = range(start, end, step)
+            pages = list(self._page_executor.map(fetch_page, starts, [min(s + step, end) for s in starts]))
+            # Pages cut short by rows deleted in between just come back shorter.
+            for _, page in pages:
+                all_rows.extend(page)
+            requested, last = pages[-1]
+            if len(last) < requested:
+                break
+            # The estimate was low: keep going, a batch of page_concurrency pages at a time.
+            start = end
+            end = start + step * self.page_concurrency
+        return all_rows
+
+    def _forecasts_query(
+        self,
+        select: str,
+        count: Optional[str],
+        version: str,
+        tag: str,
+        feeder_ids: Optional[Sequence[int]] = None,
+        scenario_type: Optional[str] = None,
+        model_architecture_type: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        since: Optional[datetime] = None,
+        min_run_timestamp: Optional[datetime] = None,
+    ):
+        query = self.schema(ML_SCHEMA).table("forecasts").select(select, count=count).eq("model_version", version).eq("tag", tag)
+        if feeder_ids is not None:
+            query = query.eq("feeder_id", feeder_ids[0]) if len(feeder_ids) == 1 else query.in_("feeder_id", list(feeder_ids))
+        if scenario_type:
+            query = query.eq("scenario_type", scenario_type)
+        if model_architecture_type:
+            query = query.eq("model_architecture_type", model_architecture_type)
+        if start:
+            query = query.gte("target_timestamp", start)
+        if end:
+            query = query.lte("target_timestamp", end)
+        if since:
+            query = query.or_(f"forecast_run_timestamp.gt.{since.isoformat()},target_timestamp.gt.{since.isoformat()}")
+        if min_run_timestamp:
+            query = query.gte("forecast_run_timestamp", min_run_timestamp.isoformat())
+        return query
+
+    def select_forecasts(
+        self,
+        version,
+        tag,
+        feeder_ids=None,
+        scenario_type=None,
+        model_architecture_type=None,
+        start=None,
+        end=None,
+        since=None,
+        min_run_timestamp=None,
+        columns=None,
+        order=("feeder_id", "target_timestamp"),
+        limit=None,
+    ) -> pd.DataFrame:
+        select = ",".join(columns) if columns else "*"
+
+        def build_query(count=None):
+            query = self._forecasts_query(
+                select, count, version, tag, feeder_ids, scenario_type, model_architecture_type, start, end, since, min_run_timestamp
+            )
+            for column in order:
+                query = query.order(column, desc=False)
+            return query
+
+        rows = self.fetch_all_rows(build_query, limit=limit)
+        return rows_to_frame(rows) if rows else pd.DataFrame()
+
+    def latest_target_timestamp(self, feeder_id, version, tag, scenario_type=None, model_architecture_type=None):
+        query = self._forecasts_query("target_timestamp", None, version, tag, [feeder_id], scenario_type, model_architecture_type)
+        response = query.order("target_timestamp", desc=True).limit(1).execute()
+        if not response.data:
+            return None
+        return pd.Timestamp(response.data[0]["target_timestamp"]).tz_convert("UTC")
+
+    def series_versions(self, feeder_ids, version, tag, scenario_type=None, model_architecture_type=None):
+        """
+        Series versions of several feeders in one round trip through the
+        ml.forecast_series_versions RPC (db/sql/forecast_series_versions.sql). Without
+        the function, the latest run is read per feeder and the counts are left out.
+        """
+        if self.versions_available:
+            params = {
+                "p_feeder_ids": [int(feeder_id) for feeder_id in feeder_ids],
+                "p_model_version": version,
+                "p_tag": tag,
+                "p_scenario_type": scenario_type,
+                "p_model_architecture_type": model_architecture_type,
+            }
+            try:
+                response = self.schema(ML_SCHEMA).rpc("forecast_series_versions", params).execute()
+                return {
+                    int(row["feeder_id"]): (pd.Timestamp(row["latest_run"]).tz_convert("UTC"), int(row["row_count"]), int(row["actual_count"]))
+                    for row in response.data
+                }
+            except APIError as e:
+                if e.code != "PGRST202":  # anything but "function not found in the schema cache"
+                    raise
+                logger.warning("ml.forecast_series_versions is not installed; series versions will only change with new forecast runs")
+                self.versions_available = False
+
+        versions = {}
+        for feeder_id in feeder_ids:
+            query = self._forecasts_query("forecast_run_timestamp", None, version, tag, [feeder_id], scenario_type, model_architecture_type)
+            response = query.order("forecast_run_timestamp", desc=True).limit(1).execute()
+            if response.data:
+                versions[feeder_id] = (pd.Timestamp(response.data[0]["forecast_run_timestamp"]).tz_convert("UTC"), None, None)
+        return versions
+
+    def forecast_aggregates(
+        self, feeder_id, version, tag, scenario_type=None, model_architecture_type=None, start=None, end=None, limit=None
+    ):
+        """
+        Aggregate a forecast series inside the database via the ml.forecast_metrics RPC,
+        without downloading its rows. Returns None when the function is not installed.
+        """
+        if not self.aggregates_available:
+            return None
+        params = {
+            "p_feeder_id": feeder_id,
+            "p_model_version": version,
+            "p_tag": tag,
+            "p_scenario_type": scenario_type,
+            "p_model_architecture_type": model_architecture_type,
+            "p_start": start.isoformat() if start else None,
+            "p_end": end.isoformat() if end else None,
+            "p_limit": limit,
+        }
+        try:
+            response = self.schema(ML_SCHEMA).rpc("forecast_metrics", params).execute()
+        except APIError as e:
+            if e.code == "PGRST202":  # function not found in the schema cache
+                logger.warning("ml.forecast_metrics is not installed; metrics will be computed from raw rows")
+                self.aggregates_available = False
+                return None
+            logger.error("Error aggregating forecasts", extra={"feeder_id": feeder_id, "code": e.code})
+            raise
+        row = response.data[0] if response.data else None
+        if row is not None and "sum_forecast" not in row:
+            logger.warning("ml.forecast_metrics predates the forecast_* columns; reapply db/sql/forecast_metrics.sql")
+            self.aggregates_available = False
+            return None
+        return row
+
+    def feeder_ids(self) -> list:
+        rows = self.fetch_all_rows(
+            lambda count=None: self.schema(METADATA_SCHEMA).table("Feeders_Metadata").select("Feeder_ID", count=count).order("Feeder_ID")
+        )
+        return [item["Feeder_ID"] for item in rows]
+
+    def _upsert(self, schema: str, table: str, rows: pd.DataFrame, on_conflict: str, ignore_duplicates: bool = False):
+        """Upsert `rows` in page_size batches, sent concurrently on the page executor."""
+        rows = rows.copy()
+        for column in TIMESTAMP_COLUMNS:
+            if column in rows.columns:
+                rows[column] = rows[column].dt.strftime("%Y-%m-%dT%H:%M:%S+00:00")
+        # NaN is not valid JSON; missing values are sent as null.
+        records = rows.astype(object).where(rows.notna(), None).to_dict(orient="records")
+
+        def send(start):
+            self.schema(schema).table(table).upsert(
+                records[start : start + self.page_size],
+                on_conflict=on_conflict,
+                ignore_duplicates=ignore_duplicates,
+                returning=ReturnMethod.minimal,
+            ).execute()
+
+        list(self._page_executor.map(send, range(0, len(records), self.page_size)))
+
+    def insert_forecasts(self, rows: pd.DataFrame):
+        self._upsert(ML_SCHEMA, "forecasts", rows, on_conflict="feeder_id, model_version, tag, target_timestamp")
+
+    def insert_feeders(self, rows: pd.DataFrame):
+        self._upsert(METADATA_SCHEMA, "Feeders_Metadata", rows, on_conflict="Feeder_ID", ignore_duplicates=True)
+
+
+class DuckDBBackend(StorageBackend):
+    """
+    Embedded DuckDB database with the same ml/metadata layout (db/sql/duckdb_schema.sql).
+
+    Filters, ordering, limits and the metric aggregates all run in SQL, and
+    results are fetched as columnar DataFrames. Needs no credentials: `path`
+    is a database file, or ":memory:".
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        if duckdb is None:
+            raise RuntimeError("duckdb is required for the embedded storage backend")
+        self.path = path
+        self.conn = duckdb.connect(path)
+        self.conn.execute("SET GLOBAL TimeZone = 'UTC'")
+        with open(os.path.join(os.path.dirname(__file__), "sql", "duckdb_schema.sql")) as f:
+            self.conn.execute(f.read())
+        self._local = threading.local()
+
+    def cursor(self):
+        """A connection for the calling thread; DuckDB connections must not be shared between threads."""
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None:
+            cursor = self._local.cursor = self.conn.cursor()
+        return cursor
+
+    @staticmethod
+    def _where(
+        version, tag, feeder_ids=None, scenario_type=None, model_architecture_type=None, start=None, end=None, since=None, min_run_timestamp=None
+    ):
+        clauses = ["model_version = ?", "tag = ?"]
+        params = [version, tag]
+        if feeder_ids is not None:
+            clauses.append(f"feeder_id IN ({', '.join('?' for _ in feeder_ids)})")
+            params.extend(int(feeder_id) for feeder_id in feeder_ids)
+        if scenario_type:
+            clauses.append("scenario_type = ?")
+            params.append(scenario_type)
+        if model_architecture_type:
+            clauses.append("model_architecture_type = ?")
+            params.append(model_architecture_type)
+        if start:
+            clauses.append("target_timestamp >= ?")
+            params.append(pd.Timestamp(start))
+        if end:
+            clauses.append("target_timestamp <= ?")
+            params.append(pd.Timestamp(end))
+        if since:
+            clauses.append("(forecast_run_timestamp > ? OR target_timestamp > ?)")
+            params.extend([pd.Timestamp(since), pd.Timestamp(since)])
+        if min_run_timestamp:
+            clauses.append("forecast_run_timestamp >= ?")
+            params.append(pd.Timestamp(min_run_timestamp))
+        return " AND ".join(clauses), params
+
+    @staticmethod
+    def _columns(columns) -> list:
+        unknown = set(columns) - set(FORECAST_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown forecast columns: {sorted(unknown)}")
+        return list(columns)
+
+    def select_forecasts(
+        self,
+        version,
+        tag,
+        feeder_ids=None,
+        scenario_type=None,
+        model_architecture_type=None,
+        start=None,
+        end=None,
+        since=None,
+        min_run_timestamp=None,
+        columns=None,
+        order=("feeder_id", "target_timestamp"),
+        limit=None,
+    ) -> pd.DataFrame:
+        select = ", ".join(self._columns(columns)) if columns else "*"
+        where, params = self._where(version, tag, feeder_ids, scenario_type, model_architecture_type, start, end, since, min_run_timestamp)
+        sql = f"SELECT {select} FROM ml.forecasts WHERE {where} ORDER BY {', '.join(self._columns(order))}"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        df = self.cursor().execute(sql, params).df()
+        return df if len(df) else pd.DataFrame()
+
+    def latest_target_timestamp(self, feeder_id, version, tag, scenario_type=None, model_architecture_type=None):
+        where, params = self._where(version, tag, [feeder_id], scenario_type, model_architecture_type)
+        # Epoch milliseconds: fetching a timestamptz scalar would need pytz on the Python side.
+        (latest,) = self.cursor().execute(f"SELECT epoch_ms(max(target_timestamp)) FROM ml.forecasts WHERE {where}", params).fetchone()
+        return pd.Timestamp(latest, unit="ms", tz="UTC") if latest is not None else None
+
+    def series_versions(self, feeder_ids, version, tag, scenario_type=None, model_architecture_type=None):
+        where, params = self._where(version, tag, feeder_ids, scenario_type, model_architecture_type)
+        sql = f"""
+            SELECT feeder_id, epoch_ms(max(forecast_run_timestamp)), count(*), count(actual_value)
+            FROM ml.forecasts WHERE {where} GROUP BY feeder_id
+        """
+        return {
+            int(feeder_id): (pd.Timestamp(latest, unit="ms", tz="UTC"), int(rows), int(actuals))
+            for feeder_id, latest, rows, actuals in self.cursor().execute(sql, params).fetchall()
+        }
+
+    def forecast_aggregates(
+        self, feeder_id, version, tag, scenario_type=None, model_architecture_type=None, start=None, end=None, limit=None
+    ):
+        """The ml.forecast_metrics aggregates, computed by DuckDB."""
+        where, params = self._where(version, tag, [feeder_id], scenario_type, model_architecture_type, start, end)
+        limit_sql = f"LIMIT {int(limit)}" if limit else ""
+        sql = f"""
+            WITH series AS (
+                SELECT forecast_value AS f, coalesce(actual_value, forecast_value) AS a
+                FROM ml.forecasts
+                WHERE {where}
+                ORDER BY target_timestamp
+                {limit_sql}
+            )
+            SELECT
+                count(*) AS row_count,
+                max(f) AS forecast_peak_load,
+                min(f) AS forecast_min_load,
+                sum(f) AS sum_forecast,
+                max(a) AS peak_load,
+                min(a) AS min_load,
+                sum(a) AS sum_load,
+                sum(abs(a - f)) AS sum_abs_error,
+                sum((a - f) * (a - f)) AS sum_sq_error,
+                sum(abs(f - a) / coalesce(nullif((abs(a) + abs(f)) / 2, 0), 1)) AS sum_smape
+            FROM series
+        """
+        cursor = self.cursor().execute(sql, params)
+        names = [d[0] for d in cursor.description]
+        return dict(zip(names, cursor.fetchone()))
+
+    def feeder_ids(self) -> list:
+        return [row[0] for row in self.cursor().execute('SELECT "Feeder_ID" FROM metadata."Feeders_Metadata" ORDER BY 1').fetchall()]
+
+    def insert_forecasts(self, rows: pd.DataFrame):
+        """Upsert rows on (feeder_id, model_version, tag, target_timestamp), as SupabaseBackend does."""
+        cursor = self.cursor()
+        cursor.register("incoming_forecasts", rows)
+        try:
+            cursor.execute("INSERT OR REPLACE INTO ml.forecasts BY NAME SELECT * FROM incoming_forecasts")
+        finally:
+            cursor.unregister("incoming_forecasts")
+
+    def insert_feeders(self, rows: pd.DataFrame):
+        cursor = self.cursor()
+        cursor.register("incoming_feeders", rows)
+        try:
+            cursor.execute('INSERT OR IGNORE INTO metadata."Feeders_Metadata" BY NAME SELECT * FROM incoming_feeders')
+        finally:
+            cursor.unregister("incoming_feeders")
+
+    def close(self):
+        self.conn.close()
+
+
+def create_backend(
+    name: str = "",
+    duckdb_path: str = ":memory:",
+    pool_limits: Optional[httpx.Limits] = None,
+    page_size: int = 1000,
+    page_concurrency: int = 4,
+) -> StorageBackend:
+    """
+    Backend by name: "supabase" or "duckdb". Without a name, Supabase is used when
+    SUPABASE_URL is set and the embedded DuckDB database otherwise.
+    """
+    name = name or ("supabase" if os.environ.get("SUPABASE_URL") else "duckdb")
+    if name == "supabase":
+        return SupabaseBackend(pool_limits=pool_limits, page_size=page_size, page_concurrency=page_concurrency)
+    if name == "duckdb":
+        return DuckDBBackend(duckdb_path)
+    raise ValueError(f"Unknown storage backend: {name}")
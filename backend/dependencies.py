@@ -0,0 +1,14 @@
+from fastapi import Request
+
+from db.async_db_manager import AsyncDBManager
+from db.live_forecasts import LiveForecasts
+
+
+def get_db(request: Request) -> AsyncDBManager:
+    """Return the application-scoped data-access object created in the lifespan hook."""
+    return request.app.state.db
+
+
+def get_live(request: Request) -> LiveForecasts:
+    """Return the application-scoped fan-out of live forecast deltas."""
+    return request.app.state.live
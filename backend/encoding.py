@@ -0,0 +1,108 @@
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+import orjson
+import pandas as pd
+
+from observability import timed_phase
+
+try:
+    import pyarrow as pa
+except ImportError:  # Arrow output is optional
+    pa = None
+
+JSON_FORMAT = "json"
+COLUMNAR_FORMAT = "columnar"
+ARROW_FORMAT = "arrow"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+COLUMNAR_MEDIA_TYPE = "application/vnd.forecast.columnar+json"
+
+ISO_TIMESTAMPS = "iso"
+EPOCH_MS_TIMESTAMPS = "epoch_ms"
+
+
+def to_epoch_ms(timestamps: pd.Series) -> np.ndarray:
+    """int64 milliseconds since the epoch (UTC) for a tz-aware datetime series."""
+    return timestamps.to_numpy(dtype="datetime64[ms]").view(np.int64)
+
+
+def encode_timestamps(epoch_ms: np.ndarray, timestamp_format: str = ISO_TIMESTAMPS) -> np.ndarray:
+    """
+    Vectorized encoder for int64 epoch-ms timestamps.
+
+    "iso" produces the same "%Y-%m-%dT%H:%M:%S%z" strings the API has always
+    returned (values are UTC, so the offset is always +0000); "epoch_ms"
+    returns the integers unchanged.
+    """
+    epoch_ms = np.asarray(epoch_ms, dtype=np.int64)
+    if timestamp_format == EPOCH_MS_TIMESTAMPS:
+        return epoch_ms
+    iso = np.datetime_as_string(epoch_ms.view("datetime64[ms]"), unit="s")
+    return np.char.add(iso, "+0000").astype(object)
+
+
+def negotiate_format(requested: Optional[str], accept: Optional[str]) -> str:
+    """Pick a response format from an explicit format= parameter, falling back to the Accept header."""
+    if requested:
+        return requested
+    accept = accept or ""
+    if ARROW_MEDIA_TYPE in accept:
+        return ARROW_FORMAT
+    if COLUMNAR_MEDIA_TYPE in accept:
+        return COLUMNAR_FORMAT
+    return JSON_FORMAT
+
+
+def forecast_arrays(df: pd.DataFrame) -> dict:
+    """Parallel NumPy arrays for a forecast frame: epoch-ms timestamps plus one float64 array per value column."""
+    arrays = {"target_timestamp": df["target_timestamp"].to_numpy(dtype=np.int64)}
+    for column in df.columns:
+        if column != "target_timestamp":
+            arrays[column] = df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+    return arrays
+
+
+@timed_phase("serialize")
+def encode_records(df: pd.DataFrame, timestamp_format: str = ISO_TIMESTAMPS) -> list:
+    """Row dicts for the default JSON format, with timestamps encoded in one vectorized pass."""
+    return df.assign(target_timestamp=encode_timestamps(df["target_timestamp"].to_numpy(), timestamp_format)).to_dict(orient="records")
+
+
+@timed_phase("serialize")
+def encode_columnar_json(feeder_id: int, df: pd.DataFrame) -> bytes:
+    """Serialize straight from the NumPy buffers; NaN (missing actuals) is written as null."""
+    body = {"feeder_id": feeder_id, **forecast_arrays(df)}
+    return orjson.dumps(body, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+@timed_phase("serialize")
+def encode_columnar_batch(frames: dict) -> bytes:
+    """Columnar JSON for several feeders, keyed by feeder ID."""
+    body = {"feeders": {str(feeder_id): {"feeder_id": feeder_id, **forecast_arrays(df)} for feeder_id, df in frames.items()}}
+    return orjson.dumps(body, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def encode_sse_delta(df: pd.DataFrame, cursor: datetime, timestamp_format: str = ISO_TIMESTAMPS) -> bytes:
+    """
+    One Server-Sent Events "delta" message: the changed rows as JSON records plus the
+    next cursor. The cursor is also the event id, so a reconnecting EventSource
+    resumes from it through the Last-Event-ID header.
+    """
+    body = orjson.dumps({"forecasts": encode_records(df, timestamp_format), "cursor": cursor}, option=orjson.OPT_SERIALIZE_NUMPY)
+    return b"event: delta\nid: " + cursor.isoformat().encode() + b"\ndata: " + body + b"\n\n"
+
+
+@timed_phase("serialize")
+def encode_arrow_ipc(df: pd.DataFrame) -> bytes:
+    if pa is None:
+        raise RuntimeError("pyarrow is required for Arrow output")
+    arrays = forecast_arrays(df)
+    columns = {"target_timestamp": pa.array(arrays.pop("target_timestamp"), type=pa.int64()).cast(pa.timestamp("ms", tz="UTC"))}
+    for name, values in arrays.items():
+        columns[name] = pa.array(values, from_pandas=True)  # NaN -> null
+    table = pa.table(columns)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
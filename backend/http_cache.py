@@ -0,0 +1,158 @@
+"""
+Response compression and conditional GET.
+
+CompressionMiddleware compresses complete response bodies with brotli (when the
+client accepts it and the brotli package is installed) or gzip. A strong ETag
+names one exact byte sequence, so compressed responses get the content coding
+appended to their ETag ("<tag>-br"), and etag_matches ignores that suffix again
+when a client revalidates.
+
+Forecast and metrics endpoints derive their ETags from the version of the
+series they served (see AsyncDBManager.series_version) and answer a matching
+If-None-Match with 304 Not Modified.
+"""
+
+import gzip
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Fast settings: brotli quality 4 already beats gzip -6 on size for this JSON, at a similar speed.
+BROTLI_QUALITY = 4
+GZIP_LEVEL = 6
+CODINGS = ("br", "gzip")
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """The preferred coding the client accepts (q > 0), or None to send the body as is."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, coding: str) -> bytes:
+    if coding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    # mtime=0 keeps the output (and so the ETag) identical for identical bodies.
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing responses under `paths` whose body is at least
+    `minimum_size` bytes. Streamed responses (more than one body message) pass
+    through untouched; Server-Sent Events are passed on from their very first
+    message, so the client gets the headers before the first event.
+    """
+
+    def __init__(self, app, paths=("/",), minimum_size: int = 1024):
+        self.app = app
+        self.paths = tuple(paths)
+        self.minimum_size = minimum_size
+
+    def applies_to(self, path: str) -> bool:
+        return any(path == prefix or path.startswith(prefix.rstrip("/") + "/") for prefix in self.paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.applies_to(scope["path"]):
+            return await self.app(scope, receive, send)
+
+        request_headers = Headers(scope=scope)
+        coding = negotiate_encoding(request_headers.get("accept-encoding", ""))
+        start = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, passthrough
+            if passthrough:
+                return await send(message)
+            if message["type"] == "http.response.start":
+                if Headers(raw=message.get("headers", [])).get("content-type", "").startswith("text/event-stream"):
+                    passthrough = True
+                    return await send(message)
+                start = message  # held until the body shows whether it is worth compressing
+                return
+            if message["type"] == "http.response.body" and start is not None:
+                held, start = start, None
+                headers = MutableHeaders(scope=held)
+                body = message.get("body", b"")
+                if held["status"] not in (204, 304):
+                    headers.add_vary_header("Accept-Encoding")
+                elif coding is not None and "etag" in headers:
+                    # A 304 confirms the (compressed) copy the client holds; send back that copy's tag.
+                    compressed = f'{headers["etag"][:-1]}-{coding}"'
+                    if compressed in (tag.strip() for tag in request_headers.get("if-none-match", "").split(",")):
+                        headers["ETag"] = compressed
+                if (
+                    coding is not None
+                    and not message.get("more_body", False)
+                    and len(body) >= self.minimum_size
+                    and "content-encoding" not in headers
+                ):
+                    body = await run_in_threadpool(compress, body, coding)
+                    headers["Content-Encoding"] = coding
+                    headers["Content-Length"] = str(len(body))
+                    etag = headers.get("etag")
+                    if etag is not None and not etag.startswith("W/"):
+                        headers["ETag"] = f'{etag[:-1]}-{coding}"'
+                    message = {**message, "body": body}
+                await send(held)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def opaque_tag(etag: str) -> str:
+    """The opaque part of an entity tag, without W/, quotes or a content-coding suffix."""
+    tag = etag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    tag = tag.strip('"')
+    for coding in CODINGS:
+        if tag.endswith(f"-{coding}"):
+            return tag[: -len(coding) - 1]
+    return tag
+
+
+def make_etag(version: Optional[str], *variant: str, weak: bool = False) -> Optional[str]:
+    """
+    ETag for a representation of a series at `version`, distinguished by `variant`
+    (e.g. the negotiated format). None when the version is unknown.
+    """
+    if version is None:
+        return None
+    tag = '"' + "-".join((version,) + variant) + '"'
+    return "W/" + tag if weak else tag
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """If-None-Match evaluation with the weak comparison RFC 9110 prescribes for it."""
+    if not if_none_match or etag is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    target = opaque_tag(etag)
+    return any(opaque_tag(candidate) == target for candidate in if_none_match.split(","))
+
+
+def validator_headers(etag: Optional[str]) -> dict:
+    """ETag plus Cache-Control: no-cache, so browsers and proxies revalidate before reusing a copy."""
+    return {"ETag": etag, "Cache-Control": "no-cache"} if etag is not None else {}
@@ -1,12 +1,100 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+import config
+from observability import configure_logging
+
+# Before the routers and db modules are imported, so what they log at import time is kept.
+configure_logging(config.LOG_LEVEL, config.LOG_FORMAT)
+
+import httpx
+from fastapi import FastAPI, Response
 from routers import feeders, forecasts, metrics
 from fastapi.middleware.cors import CORSMiddleware
 import os
 from dotenv import load_dotenv
 
+from db.async_db_manager import AsyncDBManager
+from db.db_manager_api import DBManager
+from db.forecast_cache import ForecastCache
+from db.live_forecasts import LiveForecasts
+from db.parquet_mirror import ParquetMirror
+from db.storage_backends import create_backend
+from analytics.rollups import HOUR_MS, RollupStore
+from observability import REGISTRY, CacheCollector, PrometheusMiddleware, ServerTimingMiddleware, latest_metrics
+from profiling import ProfilingMiddleware
+from http_cache import CompressionMiddleware
+
 # load_dotenv()  # Load SUPABASE_URL and SUPABASE_SECRET_KEY
+logger = logging.getLogger(__name__)
+
+
+async def sync_mirror_forever(db: AsyncDBManager):
+    """Keep the local forecast mirror in sync; failures (e.g. while offline) are retried next round."""
+    while True:
+        try:
+            await db.sync_mirror()
+        except Exception:
+            logger.exception("Error syncing the forecast mirror")
+        await asyncio.sleep(config.FORECAST_MIRROR_SYNC_SECONDS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One data-access object (and one HTTP connection pool) per process, shared by every router.
+    pool_limits = httpx.Limits(
+        max_connections=config.DB_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=config.DB_POOL_MAX_KEEPALIVE,
+        keepalive_expiry=config.DB_POOL_KEEPALIVE_EXPIRY,
+    )
+    cache = ForecastCache(max_bytes=config.FORECAST_CACHE_MAX_BYTES, ttl_seconds=config.FORECAST_CACHE_TTL_SECONDS)
+    mirror = ParquetMirror(config.FORECAST_MIRROR_DIR) if config.FORECAST_MIRROR_DIR else None
+    backend = create_backend(
+        config.STORAGE_BACKEND,
+        duckdb_path=config.DUCKDB_PATH,
+        pool_limits=pool_limits,
+        page_size=config.DB_PAGE_SIZE,
+        page_concurrency=config.DB_PAGE_CONCURRENCY,
+    )
+    db = DBManager(backend=backend, mirror=mirror)
+    rollups = RollupStore(
+        refresh_seconds=config.ROLLUP_REFRESH_SECONDS,
+        lookback_ms=int(config.ROLLUP_LOOKBACK_HOURS * HOUR_MS),
+        max_bytes=config.ROLLUP_MAX_BYTES,
+    )
+    app.state.db = AsyncDBManager(
+        db,
+        max_workers=config.DB_MAX_WORKERS,
+        cache=cache,
+        rollups=rollups,
+        summary_refresh_seconds=config.FEEDER_SUMMARY_REFRESH_SECONDS,
+        summary_concurrency=config.FEEDER_SUMMARY_CONCURRENCY,
+        leaderboard_chunk_size=config.LEADERBOARD_CHUNK_FEEDERS,
+    )
+    app.state.live = LiveForecasts(app.state.db, poll_seconds=config.STREAM_POLL_SECONDS, queue_size=config.STREAM_QUEUE_SIZE)
+    mirror_sync = asyncio.create_task(sync_mirror_forever(app.state.db)) if mirror is not None else None
+    cache_collector = CacheCollector(cache, rollups)
+    REGISTRY.register(cache_collector)
+    try:
+        yield
+    finally:
+        REGISTRY.unregister(cache_collector)
+        if mirror_sync is not None:
+            mirror_sync.cancel()
+        app.state.live.close()
+        app.state.db.close()
 
-app = FastAPI(title="Forecast Viewer API")
+
+app = FastAPI(title="Forecast Viewer API", lifespan=lifespan)
+
+# Inside CORS, so profiles returned in place of a response are readable cross-origin.
+app.add_middleware(
+    ProfilingMiddleware,
+    token=config.PROFILING_TOKEN,
+    output_dir=config.PROFILE_DIR,
+    interval=config.PROFILE_INTERVAL_SECONDS,
+)
 
 # Allow CORS for frontend
 app.add_middleware(
@@ -15,7 +103,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "ETag", "X-Forecast-Cursor"],
 )
+# Inside PrometheusMiddleware, so response sizes are recorded as sent on the wire.
+app.add_middleware(CompressionMiddleware, paths=("/forecasts", "/metrics"), minimum_size=config.COMPRESSION_MIN_BYTES)
+app.add_middleware(PrometheusMiddleware)
+if config.SERVER_TIMING:
+    app.add_middleware(ServerTimingMiddleware)
 
 # Register routers
 app.include_router(feeders.router, prefix="/feeders", tags=["feeders"])
@@ -26,3 +120,15 @@ app.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
 @app.get("/")
 async def root():
     return {"message": "Forecast Viewer Backend Running!"}
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return app.state.db.cache_stats()
+
+
+@app.get("/metrics-prom", include_in_schema=False)
+async def metrics_prom():
+    """Prometheus scrape endpoint (see observability.py)."""
+    body, content_type = latest_metrics()
+    return Response(body, media_type=content_type)
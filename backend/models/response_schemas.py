@@ -1,13 +1,31 @@
+from datetime import datetime
 from pydantic import BaseModel
-from typing import List, Dict
+from typing import List, Dict, Optional, Union
 
 
 class FeederListResponse(BaseModel):
     feeders: List[int]
 
 
+class FeederSummary(BaseModel):
+    # Metrics cover the UTC day of the feeder's latest forecast; the errors and count
+    # only its rows with actuals.
+    feeder_id: int
+    last_forecast_timestamp: Optional[datetime]
+    peak_load: float
+    average_load: float
+    mae: float
+    rmse: float
+    smape: float
+    count: int
+
+
+class FeederSummaryResponse(BaseModel):
+    feeders: List[FeederSummary]
+
+
 class ForecastEntry(BaseModel):
-    target_timestamp: str
+    target_timestamp: Union[str, int]  # ISO 8601 string, or epoch milliseconds with timestamps=epoch_ms
     forecast_value: float
     actual_value: float
 
@@ -16,6 +34,56 @@ class ForecastListResponse(BaseModel):
     forecasts: List[ForecastEntry]
 
 
+class ForecastDeltaResponse(ForecastListResponse):
+    # Rows changed after the request's `since`; pass `cursor` as the next `since`.
+    cursor: datetime
+
+
+class BatchForecastResponse(BaseModel):
+    forecasts: Dict[int, List[ForecastEntry]]  # keyed by feeder ID, in request order
+
+
 class MetricsResponse(BaseModel):
+    # peak/average/min_load describe forecast_value. The actual_* statistics and the errors use
+    # actual_value, falling back to forecast_value where the actual is missing.
     peak_load: float
     average_load: float
+    min_load: float = 0.0
+    actual_peak_load: float = 0.0
+    actual_average_load: float = 0.0
+    actual_min_load: float = 0.0
+    mae: float = 0.0
+    rmse: float = 0.0
+    smape: float = 0.0  # percent
+    count: int = 0
+
+
+class ForecastColumnsResponse(BaseModel):
+    """Documents the columnar format; responses are encoded directly from NumPy arrays, not through this model."""
+
+    feeder_id: int
+    target_timestamp: List[int]  # epoch milliseconds, UTC
+    forecast_value: List[float]
+    actual_value: List[Optional[float]]
+
+
+class BatchForecastColumnsResponse(BaseModel):
+    """Documents the columnar format of the batch endpoint."""
+
+    feeders: Dict[int, ForecastColumnsResponse]
+
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    feeder_id: int
+    mae: float
+    rmse: float
+    smape: float  # percent
+    count: int
+
+
+class LeaderboardResponse(BaseModel):
+    metric: str
+    model_version: str
+    ranked_feeders: int  # feeders with data in the range; entries holds the best k of them
+    entries: List[LeaderboardEntry]
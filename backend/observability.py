@@ -0,0 +1,298 @@
+"""
+Logging and Prometheus instrumentation shared by the API and the data-access layer.
+
+Metrics live in prometheus_client's default registry and are served by
+GET /metrics-prom. With several uvicorn workers each process keeps its own
+counters, so scrape the workers individually (or use the client's multiprocess mode).
+
+Each request also accumulates the time spent in its db, transform and
+serialize phases, reported in a Server-Timing header.
+"""
+
+import functools
+import inspect
+import json
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+import pandas as pd
+from fastapi.routing import APIRoute
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from starlette.datastructures import MutableHeaders
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time to send a complete response, by route template.",
+    ["method", "route", "status"],
+)
+HTTP_RESPONSE_BYTES = Histogram(
+    "http_response_size_bytes",
+    "Response body size as sent on the wire, by route template.",
+    ["route"],
+    buckets=[2**n for n in range(8, 27, 2)],  # 256 B .. 64 MiB
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds",
+    "DatabaseManager call latency, by method.",
+    ["method"],
+)
+DB_QUERY_ERRORS = Counter("db_query_errors_total", "DatabaseManager calls that raised, by method.", ["method"])
+DB_ROWS_FETCHED = Counter("db_rows_fetched_total", "Rows returned by DatabaseManager calls, by method.", ["method"])
+
+
+class RequestTimings:
+    """Seconds one request spent per phase. Phases can be recorded from worker threads."""
+
+    PHASES = ("db", "transform", "serialize")
+
+    def __init__(self):
+        self.seconds = dict.fromkeys(self.PHASES, 0.0)
+        self.endpoint_done: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def add(self, phase: str, seconds: float):
+        with self._lock:
+            self.seconds[phase] += seconds
+
+    def merge(self, other: "RequestTimings"):
+        """Add the phases of work done on this request's behalf elsewhere (e.g. a shared fetch)."""
+        for phase, seconds in other.seconds.items():
+            self.add(phase, seconds)
+
+    def header(self, total: float) -> str:
+        parts = [f"{phase};dur={seconds * 1000:.1f}" for phase, seconds in self.seconds.items()]
+        return ", ".join(parts + [f"total;dur={total * 1000:.1f}"])
+
+
+# Timings of the request being served; AsyncDBManager copies the context into its worker threads.
+REQUEST_TIMINGS: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def timed_phase(phase: str):
+    """Add the decorated function's run time to the current request's `phase`."""
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            timings = REQUEST_TIMINGS.get()
+            if timings is None:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                timings.add(phase, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+# Attributes every LogRecord has; anything else was passed through `extra=`.
+RESERVED_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and any `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update({k: v for k, v in vars(record).items() if k not in RESERVED_ATTRS})
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level: str = "INFO", fmt: str = "json"):
+    """Route the root logger to stderr as JSON lines ("json") or plain text ("text")."""
+    handler = logging.StreamHandler()
+    if fmt == "json":
+        handler.setFormatter(JSONFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(level.upper())
+    # httpx logs every PostgREST round trip at INFO; those are covered by the db_query metrics.
+    logging.getLogger("httpx").setLevel(max(root.level, logging.WARNING))
+
+
+def row_count(result) -> int:
+    if isinstance(result, (pd.DataFrame, list)):
+        return len(result)
+    if isinstance(result, dict):  # {feeder_id: frame} batches
+        return sum(len(v) for v in result.values() if isinstance(v, pd.DataFrame))
+    return 0
+
+
+def observe_query(method: str):
+    """Record the latency, errors and returned row count of a data-access method under `method`."""
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                DB_QUERY_ERRORS.labels(method).inc()
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                DB_QUERY_SECONDS.labels(method).observe(elapsed)
+                timings = REQUEST_TIMINGS.get()
+                if timings is not None:
+                    timings.add("db", elapsed)
+            DB_ROWS_FETCHED.labels(method).inc(row_count(result))
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+class CacheCollector:
+    """Exports a ForecastCache's counters and hit ratio, and the RollupStore's size, at scrape time."""
+
+    def __init__(self, cache, rollups=None):
+        self.cache = cache
+        self.rollups = rollups
+
+    def collect(self):
+        stats = self.cache.stats()
+        yield CounterMetricFamily("forecast_cache_hits", "Forecast cache lookups that found an entry.", value=stats["hits"])
+        yield CounterMetricFamily("forecast_cache_misses", "Forecast cache lookups that did not.", value=stats["misses"])
+        yield CounterMetricFamily("forecast_cache_evictions", "Entries evicted to stay under the size limit.", value=stats["evictions"])
+        yield GaugeMetricFamily("forecast_cache_hit_ratio", "Hits over all lookups since start.", value=stats["hit_ratio"])
+        yield GaugeMetricFamily("forecast_cache_bytes", "In-memory size of the cached frames.", value=stats["bytes"])
+        yield GaugeMetricFamily("forecast_cache_entries", "Cached frames.", value=stats["entries"])
+        if self.rollups is not None:
+            stats = self.rollups.stats()
+            yield CounterMetricFamily("rollup_store_evictions", "Rollup series dropped to stay under the size limit.", value=stats["evictions"])
+            yield GaugeMetricFamily("rollup_store_bytes", "In-memory size of the rollup buckets.", value=stats["bytes"])
+            yield GaugeMetricFamily("rollup_store_series", "Series with materialized rollups.", value=stats["series"])
+
+
+def route_template(scope) -> str:
+    """
+    Path template of the route that served a request, e.g. /forecasts/{feeder_id}.
+
+    Routes of included routers may carry only the path relative to their prefix,
+    so the prefix is taken from the leading segments of the request path.
+    """
+    route = scope.get("route")
+    if route is None or not hasattr(route, "path"):
+        return "<unmatched>"
+    route_segments = [s for s in route.path.split("/") if s]
+    path_segments = [s for s in scope["path"].split("/") if s]
+    template = "/" + "/".join(path_segments[: len(path_segments) - len(route_segments)] + route_segments)
+    if route.path.endswith("/") and not template.endswith("/"):
+        template += "/"
+    return template
+
+
+class PrometheusMiddleware:
+    """
+    ASGI middleware recording each request's latency and response size under its
+    route template (e.g. /forecasts/{feeder_id}), so the label set stays bounded.
+    Streaming responses are timed until the stream ends.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            template = route_template(scope)
+            HTTP_REQUEST_SECONDS.labels(scope["method"], template, str(status)).observe(time.perf_counter() - start)
+            HTTP_RESPONSE_BYTES.labels(template).observe(size)
+
+
+class ServerTimingMiddleware:
+    """ASGI middleware collecting RequestTimings for each request and sending them as Server-Timing."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        timings = RequestTimings()
+        token = REQUEST_TIMINGS.set(timings)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("Server-Timing", timings.header(time.perf_counter() - start))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUEST_TIMINGS.reset(token)
+
+
+class TimedRoute(APIRoute):
+    """
+    APIRoute that books the time between its endpoint returning and the response
+    being built (response_model validation and JSON rendering) as "serialize".
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if inspect.iscoroutinefunction(endpoint):
+            original = endpoint
+
+            @functools.wraps(original)
+            async def endpoint(*args, **kw):
+                try:
+                    return await original(*args, **kw)
+                finally:
+                    timings = REQUEST_TIMINGS.get()
+                    if timings is not None:
+                        timings.endpoint_done = time.perf_counter()
+
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            response = await handler(request)
+            timings = REQUEST_TIMINGS.get()
+            if timings is not None and timings.endpoint_done is not None:
+                timings.add("serialize", time.perf_counter() - timings.endpoint_done)
+            return response
+
+        return timed_handler
+
+
+def latest_metrics() -> tuple:
+    """The scrape body and its content type."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
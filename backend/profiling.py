@@ -0,0 +1,167 @@
+"""
+On-demand profiling of single API requests with pyinstrument.
+
+A request is profiled when it carries the admin token, either as an
+`X-Profile: <token>` header or a `?profile=<token>` query parameter; with no
+PROFILING_TOKEN configured the middleware is a pass-through. The profile is an
+interactive flame graph ("html", the default) or a speedscope file
+("speedscope", open it at https://www.speedscope.app), chosen with the
+`X-Profile-Format` header or the `profile_format` query parameter.
+
+With PROFILE_DIR set, the profile is written there and the request is answered
+normally, naming the file in an `X-Profile-File` header. Otherwise the profile
+replaces the response body and the endpoint's own status is reported in
+`X-Profiled-Status`. Not meant for the /stream endpoints, which never finish.
+
+The sampler follows the request's task across awaits. Database calls still
+run in the worker pool: AsyncDBManager._run samples each one with a profiler in
+its worker thread, and those samples are merged into the request's profile as
+separate call trees. A profiled request does its own fetches rather than
+sharing them through SingleFlight, and background tasks start in a fresh
+context, so neither samples nor state from a profiled request leak into them.
+"""
+
+import hmac
+import logging
+import os
+import re
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, QueryParams
+
+try:
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import HTMLRenderer, SpeedscopeRenderer
+    from pyinstrument.session import Session
+except ImportError:  # profiling is optional
+    Profiler = None
+
+logger = logging.getLogger(__name__)
+
+
+class RequestProfile:
+    """Profiler sessions recorded in worker threads on behalf of one profiled request."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.sessions = []
+
+    def run(self, fn, *args, **kwargs):
+        """Call fn in the current (worker) thread, sampling it into this request's profile."""
+        profiler = Profiler(interval=self.interval, async_mode="disabled")
+        profiler.start()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profiler.stop()
+            self.sessions.append(profiler.last_session)
+
+    def combined(self, session):
+        """The request's own session with every worker session merged in."""
+        for worker in self.sessions:
+            session = Session.combine(session, worker)
+        return session
+
+
+# The profile of the request being served, or None when it is not profiled.
+PROFILING: ContextVar[Optional[RequestProfile]] = ContextVar("profiling", default=None)
+
+FORMATS = {
+    "html": ("html", "text/html; charset=utf-8"),
+    "speedscope": ("speedscope.json", "application/json"),
+}
+
+
+def profile_filename(scope, fmt: str) -> str:
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_") or "root"
+    return f"{time.strftime('%Y%m%dT%H%M%S')}-{time.time_ns() % 1_000_000:06d}-{scope['method']}-{slug}.{FORMATS[fmt][0]}"
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling the requests that present the admin token."""
+
+    def __init__(self, app, token: str = "", output_dir: str = "", interval: float = 0.001):
+        self.app = app
+        self.token = token
+        self.output_dir = output_dir
+        self.interval = interval
+        if token and Profiler is None:
+            logger.warning("PROFILING_TOKEN is set but pyinstrument is not installed; profiling is disabled")
+
+    def requested_format(self, scope):
+        """The profile format if this request asked for profiling with a valid token, else None."""
+        headers = Headers(scope=scope)
+        query = QueryParams(scope["query_string"])
+        token = headers.get("x-profile") or query.get("profile")
+        if not token or not hmac.compare_digest(token.encode(), self.token.encode()):
+            return None
+        fmt = headers.get("x-profile-format") or query.get("profile_format") or "html"
+        return fmt if fmt in FORMATS else "html"
+
+    def render(self, fmt: str, session, path: Optional[str]) -> str:
+        """Render a profile session, also writing it to `path` if given. Blocking, so run off the event loop."""
+        renderer = SpeedscopeRenderer() if fmt == "speedscope" else HTMLRenderer()
+        output = renderer.render(session)
+        if path is not None:
+            os.makedirs(self.output_dir, exist_ok=True)
+            with open(path, "w") as f:
+                f.write(output)
+        return output
+
+    async def __call__(self, scope, receive, send):
+        fmt = None
+        if scope["type"] == "http" and self.token and Profiler is not None:
+            fmt = self.requested_format(scope)
+        if fmt is None:
+            return await self.app(scope, receive, send)
+
+        path = os.path.join(self.output_dir, profile_filename(scope, fmt)) if self.output_dir else None
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if path is not None:
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [(b"x-profile-file", os.path.basename(path).encode())]
+            if path is not None:
+                await send(message)
+
+        profiler = Profiler(interval=self.interval, async_mode="enabled")
+        profile = RequestProfile(self.interval)
+        token = PROFILING.set(profile)
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.stop()
+            PROFILING.reset(token)
+
+        session = profiler.last_session
+        # Rendering a large profile takes as long as a slow request; keep it off the event loop.
+        output = await run_in_threadpool(lambda: self.render(fmt, profile.combined(session), path))
+        logger.info(
+            "Profiled request",
+            extra={"path": scope["path"], "status": status, "duration_s": round(session.duration, 4), "profile": path},
+        )
+        if path is not None:
+            return
+
+        body = output.encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", FORMATS[fmt][1].encode()),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"x-profiled-status", str(status).encode()),
+                    (b"cache-control", b"no-store"),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -1,12 +1,19 @@
-from fastapi import APIRouter
-from db.db_manager_api import DBManager
-from models.response_schemas import FeederListResponse
+from fastapi import APIRouter, Depends
+from db.async_db_manager import AsyncDBManager
+from dependencies import get_db
+from observability import TimedRoute
+from models.response_schemas import FeederListResponse, FeederSummaryResponse
 
-router = APIRouter()
-db = DBManager()
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.get("/", response_model=FeederListResponse)
-async def get_feeders():
-    feeder_ids = db.get_all_feeder_ids()
+async def get_feeders(db: AsyncDBManager = Depends(get_db)):
+    feeder_ids = await db.get_all_feeder_ids()
     return FeederListResponse(feeders=feeder_ids)
+
+
+@router.get("/summary", response_model=FeederSummaryResponse)
+async def get_feeder_summary(db: AsyncDBManager = Depends(get_db)):
+    summary = await db.load_feeder_summary()
+    return FeederSummaryResponse(feeders=summary)
@@ -1,12 +1,194 @@
-from fastapi import APIRouter
-from db.db_manager_api import DBManager
-from models.response_schemas import ForecastListResponse
+import asyncio
+from datetime import datetime
+from typing import Literal, Optional, Union
 
-router = APIRouter()
-db = DBManager()
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from analytics.downsample import downsample_frame
+from analytics.rollups import rollup_series
+from db.async_db_manager import AsyncDBManager
+import config
+from db.live_forecasts import LiveForecasts
+from dependencies import get_db, get_live
+from http_cache import etag_matches, make_etag, validator_headers
+from encoding import (
+    ARROW_FORMAT,
+    ARROW_MEDIA_TYPE,
+    COLUMNAR_FORMAT,
+    COLUMNAR_MEDIA_TYPE,
+    encode_arrow_ipc,
+    encode_columnar_batch,
+    encode_columnar_json,
+    encode_records,
+    encode_sse_delta,
+    negotiate_format,
+    pa,
+)
+from observability import TimedRoute
+from models.response_schemas import (
+    BatchForecastColumnsResponse,
+    BatchForecastResponse,
+    ForecastColumnsResponse,
+    ForecastDeltaResponse,
+    ForecastListResponse,
+)
 
+router = APIRouter(route_class=TimedRoute)
 
-@router.get("/{feeder_id}", response_model=ForecastListResponse)
-async def get_forecasts_for_feeder(feeder_id: int):
-    forecasts_df = db.load_forecasts_for_api(feeder_id)
-    return ForecastListResponse(forecasts=forecasts_df.to_dict(orient="records"))
+CURSOR_HEADER = "X-Forecast-Cursor"
+
+
+def parse_feeder_ids(feeder_ids: str) -> list:
+    try:
+        ids = [int(part) for part in feeder_ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=422, detail="feeder_ids must be a comma-separated list of integers")
+    if not ids:
+        raise HTTPException(status_code=422, detail="feeder_ids must name at least one feeder")
+    return list(dict.fromkeys(ids))
+
+
+@router.get(
+    "",
+    response_model=BatchForecastResponse,
+    responses={200: {"content": {COLUMNAR_MEDIA_TYPE: {"schema": BatchForecastColumnsResponse.model_json_schema()}}}},
+)
+async def get_forecasts_for_feeders(
+    feeder_ids: str = Query(..., description="Comma-separated feeder IDs, e.g. 1,2,3"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: Optional[int] = Query(None, ge=1, description="Row cap per feeder"),
+    format: Optional[Literal["json", "columnar"]] = None,
+    timestamps: Literal["iso", "epoch_ms"] = "iso",
+    max_points: Optional[int] = Query(None, ge=3, description="LTTB-downsample each series to at most this many points"),
+    accept: Optional[str] = Header(None),
+    db: AsyncDBManager = Depends(get_db),
+):
+    """Forecasts for several feeders in one request, fetched with a single batch query."""
+    ids = parse_feeder_ids(feeder_ids)
+    response_format = negotiate_format(format, accept)
+    if response_format == ARROW_FORMAT:
+        raise HTTPException(status_code=406, detail="Arrow output is only available per feeder")
+
+    frames = await db.load_forecasts_for_feeders(ids, start=start, end=end, limit=limit)
+    if max_points is not None:
+        frames = {feeder_id: await run_in_threadpool(downsample_frame, df, max_points) for feeder_id, df in frames.items()}
+    if response_format == COLUMNAR_FORMAT:
+        return Response(encode_columnar_batch(frames), media_type=COLUMNAR_MEDIA_TYPE)
+    return BatchForecastResponse(forecasts={feeder_id: encode_records(df, timestamps) for feeder_id, df in frames.items()})
+
+
+@router.get(
+    "/{feeder_id}",
+    response_model=Union[ForecastDeltaResponse, ForecastListResponse],
+    responses={
+        200: {
+            "content": {
+                COLUMNAR_MEDIA_TYPE: {"schema": ForecastColumnsResponse.model_json_schema()},
+                ARROW_MEDIA_TYPE: {},
+            }
+        }
+    },
+)
+async def get_forecasts_for_feeder(
+    feeder_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    format: Optional[Literal["json", "columnar", "arrow"]] = None,
+    timestamps: Literal["iso", "epoch_ms"] = "iso",
+    max_points: Optional[int] = Query(None, ge=3, description="LTTB-downsample the series to at most this many points"),
+    resolution: Optional[Literal["hour", "day", "week"]] = Query(None, description="Serve bucket means from the rollups"),
+    since: Optional[datetime] = Query(None, description="Only rows changed after this cursor (a previous response's cursor)"),
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    response: Response = None,
+    db: AsyncDBManager = Depends(get_db),
+):
+    """
+    Full series responses carry an ETag derived from the series version (plus the
+    negotiated format); sending it back in If-None-Match yields 304 while no new
+    forecast run has landed. They also name the cursor to pass as `since` for the
+    rows that land afterwards. Rollup responses are not validated.
+    """
+    response_format = negotiate_format(format, accept)
+    if response_format == ARROW_FORMAT and pa is None:
+        raise HTTPException(status_code=406, detail="Arrow output is not available on this server")
+
+    if since is not None:
+        # A delta holds every row changed after the cursor; a window or row limit would lose rows the next cursor skips.
+        if any(param is not None for param in (start, end, limit, resolution, max_points)):
+            raise HTTPException(status_code=422, detail="since cannot be combined with start, end, limit, resolution or max_points")
+        delta_df, cursor = await db.load_forecast_delta(feeder_id, since)
+        headers = {CURSOR_HEADER: cursor.isoformat()}
+        if response_format == COLUMNAR_FORMAT:
+            return Response(encode_columnar_json(feeder_id, delta_df), media_type=COLUMNAR_MEDIA_TYPE, headers=headers)
+        if response_format == ARROW_FORMAT:
+            return Response(encode_arrow_ipc(delta_df), media_type=ARROW_MEDIA_TYPE, headers=headers)
+        response.headers.update(headers)
+        return ForecastDeltaResponse(forecasts=encode_records(delta_df, timestamps), cursor=cursor)
+
+    etag = cursor = None
+    if resolution is not None:
+        forecasts_df = rollup_series(await db.load_rollups(feeder_id, resolution, start=start, end=end)).iloc[:limit]
+    else:
+        forecasts_df = await db.load_forecasts_for_api(feeder_id, start=start, end=end, limit=limit)
+        etag = make_etag(db.series_version(forecasts_df), response_format)
+        cursor = db.series_cursor(forecasts_df)
+    # The ETag depends on the negotiated format, so shared caches must key on Accept too.
+    headers = {"Vary": "Accept", **validator_headers(etag)}
+    if cursor is not None:
+        # Where ?since= (or the stream) should continue from after this response.
+        headers[CURSOR_HEADER] = cursor.isoformat()
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    if max_points is not None and len(forecasts_df) > max_points:
+        forecasts_df = await run_in_threadpool(downsample_frame, forecasts_df, max_points)
+    if response_format == COLUMNAR_FORMAT:
+        return Response(encode_columnar_json(feeder_id, forecasts_df), media_type=COLUMNAR_MEDIA_TYPE, headers=headers)
+    if response_format == ARROW_FORMAT:
+        return Response(encode_arrow_ipc(forecasts_df), media_type=ARROW_MEDIA_TYPE, headers=headers)
+    response.headers.update(headers)
+    return ForecastListResponse(forecasts=encode_records(forecasts_df, timestamps))
+
+
+@router.get("/{feeder_id}/stream", response_class=StreamingResponse, responses={200: {"content": {"text/event-stream": {}}}})
+async def stream_forecasts_for_feeder(
+    feeder_id: int,
+    request: Request,
+    since: Optional[datetime] = Query(None, description="Cursor to catch up from before streaming"),
+    last_event_id: Optional[datetime] = Header(None),
+    db: AsyncDBManager = Depends(get_db),
+    live: LiveForecasts = Depends(get_live),
+):
+    """
+    Server-Sent Events stream of newly landed forecast rows for a feeder, one
+    "delta" event per change (see ?since= on /forecasts/{feeder_id}). A client
+    reconnecting with Last-Event-ID first receives what it missed.
+    """
+    since = last_event_id or since
+    queue = live.subscribe(feeder_id)
+
+    async def events():
+        try:
+            # Something to read right away, for proxies that time out a response without a first byte.
+            yield b": stream open\n\n"
+            if since is not None:
+                delta_df, cursor = await db.load_forecast_delta(feeder_id, since)
+                yield encode_sse_delta(delta_df, cursor)
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=config.STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield b": keep-alive\n\n"
+                    continue
+                if item is None:  # fell behind; the client reconnects with Last-Event-ID and catches up
+                    break
+                yield encode_sse_delta(*item)
+        finally:
+            live.unsubscribe(feeder_id, queue)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
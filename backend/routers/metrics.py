@@ -1,17 +1,66 @@
-from fastapi import APIRouter
-from db.db_manager_api import DBManager
-from models.response_schemas import MetricsResponse
+import logging
+from datetime import datetime
+from typing import Literal, Optional
 
-router = APIRouter()
-db = DBManager()
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from analytics.leaderboard import top_k
+from analytics.rollups import rollup_metrics
+from db.async_db_manager import AsyncDBManager
+from dependencies import get_db
+from http_cache import etag_matches, make_etag, validator_headers
+from observability import TimedRoute
+from models.response_schemas import LeaderboardResponse, MetricsResponse
 
+logger = logging.getLogger(__name__)
 
-@router.get("/{feeder_id}", response_model=MetricsResponse)
-async def get_metrics_for_feeder(feeder_id: int):
-    forecasts_df = db.load_forecasts_for_api(feeder_id)
-    if forecasts_df.empty:
-        return MetricsResponse(peak_load=0.0, average_load=0.0)
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.get("/leaderboard", response_model=LeaderboardResponse)
+async def get_leaderboard(
+    metric: Literal["rmse", "smape", "mae"] = "rmse",
+    model_version: Optional[str] = Query(None, description="Defaults to the model version the API serves"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    k: int = Query(10, ge=1, le=1000, description="Number of best feeders to return"),
+    db: AsyncDBManager = Depends(get_db),
+):
+    """Feeders ranked by accuracy (lowest error first) for a model version and date range."""
+    try:
+        table = await db.load_fleet_metrics(version=model_version, start=start, end=end)
+    except Exception:
+        logger.exception("Error computing fleet metrics", extra={"model_version": model_version})
+        raise HTTPException(status_code=503, detail="Fleet metrics are unavailable, retry later")
+    ranked = top_k(table, metric, k)
+    return LeaderboardResponse(
+        metric=metric,
+        model_version=model_version or db.db.MODEL_VERSION,
+        ranked_feeders=int((table["count"] > 0).sum()),
+        entries=ranked.to_dict(orient="records"),
+    )
 
-    peak_load = forecasts_df["forecast_value"].max()
-    average_load = forecasts_df["forecast_value"].mean()
-    return MetricsResponse(peak_load=peak_load, average_load=average_load)
+
+@router.get("/{feeder_id}", response_model=MetricsResponse)
+async def get_metrics_for_feeder(
+    feeder_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    resolution: Optional[Literal["hour", "day", "week"]] = Query(None, description="Answer from rollup buckets at this resolution"),
+    if_none_match: Optional[str] = Header(None),
+    response: Response = None,
+    db: AsyncDBManager = Depends(get_db),
+):
+    if resolution is not None:
+        if limit is not None:
+            raise HTTPException(status_code=422, detail="limit cannot be combined with resolution")
+        metrics = rollup_metrics(await db.load_rollups(feeder_id, resolution, start=start, end=end))
+        return MetricsResponse(**metrics)
+    metrics, version = await db.load_metrics_versioned(feeder_id, start=start, end=end, limit=limit)
+    # Weak: database aggregates and in-memory metrics of the same series can differ in the last float digit.
+    etag = make_etag(version, weak=True)
+    headers = validator_headers(etag)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return MetricsResponse(**metrics)
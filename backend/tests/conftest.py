@@ -0,0 +1,49 @@
+import os
+import tempfile
+
+import pandas as pd
+import pytest
+
+# The app reads its configuration at import time: point it at an embedded DuckDB file before anything imports config.
+DATA_DIR = tempfile.mkdtemp(prefix="forecast-api-tests-")
+os.environ.update(
+    {
+        "STORAGE_BACKEND": "duckdb",
+        "DUCKDB_PATH": os.path.join(DATA_DIR, "forecasts.duckdb"),
+        "SUPABASE_URL": "",
+        "FORECAST_MIRROR_DIR": "",
+        "PROFILING_TOKEN": "",
+        "LOG_LEVEL": "WARNING",
+    }
+)
+
+from benchmarks.synthetic_fleet import feeder_metadata, forecast_chunks  # noqa: E402
+from db.storage_backends import DuckDBBackend  # noqa: E402
+
+FEEDER_IDS = (1, 2)
+DAYS = 3
+
+
+def fleet_rows() -> pd.DataFrame:
+    """Three days of 15-minute forecasts for FEEDER_IDS; the last day has no actuals yet."""
+    return pd.concat(forecast_chunks(FEEDER_IDS, days=DAYS), ignore_index=True)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def seeded_database():
+    backend = DuckDBBackend(os.environ["DUCKDB_PATH"])
+    backend.insert_feeders(feeder_metadata(FEEDER_IDS))
+    backend.insert_forecasts(fleet_rows())
+    backend.close()
+    yield os.environ["DUCKDB_PATH"]
+
+
+@pytest.fixture
+def client(seeded_database):
+    """A TestClient whose lifespan builds fresh caches, so every test starts cold."""
+    from fastapi.testclient import TestClient
+
+    from main import app
+
+    with TestClient(app) as client:
+        yield client
@@ -0,0 +1,22 @@
+def test_single_feeder_reads_after_a_batch_keep_validators(client):
+    batch = client.get("/forecasts", params={"feeder_ids": "1,2"})
+    assert batch.status_code == 200
+
+    # Served from the entries the batch request cached.
+    forecasts = client.get("/forecasts/1")
+    assert forecasts.status_code == 200
+    assert forecasts.headers.get("etag")
+    assert forecasts.headers.get("x-forecast-cursor")
+
+    metrics = client.get("/metrics/1")
+    assert metrics.status_code == 200
+    assert metrics.headers.get("etag")
+
+    assert client.get("/forecasts/1", headers={"If-None-Match": forecasts.headers["etag"]}).status_code == 304
+
+
+def test_batch_rows_match_single_feeder_reads(client):
+    batch = client.get("/forecasts", params={"feeder_ids": "2,1"}).json()["forecasts"]
+    assert sorted(batch) == ["1", "2"]
+    for feeder_id in ("1", "2"):
+        assert batch[feeder_id] == client.get(f"/forecasts/{feeder_id}").json()["forecasts"]
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics.downsample import downsample_frame, lttb_indices
+
+
+def plain_lttb(x, y, n_out):
+    """Textbook LTTB as a plain loop, over the same bucket edges as lttb_indices."""
+    n = len(x)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = [0]
+    a = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        if b + 1 < n_out - 2:
+            nxt = range(edges[b + 1], edges[b + 2])
+            x_next = sum(float(x[i]) for i in nxt) / len(nxt)
+            y_next = sum(float(y[i]) for i in nxt) / len(nxt)
+        else:
+            x_next, y_next = float(x[-1]), float(y[-1])
+        best, best_area = lo, -1.0
+        for i in range(lo, hi):
+            area = abs((x[a] - x_next) * (y[i] - y[a]) - (x[a] - x[i]) * (y_next - y[a]))
+            if area > best_area:
+                best, best_area = i, area
+        selected.append(best)
+        a = best
+    selected.append(n - 1)
+    return np.array(selected)
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_matches_plain_loop_lttb(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(10, 400))
+    n_out = int(rng.integers(3, n))
+    # Integer coordinates keep every sum exact, so both implementations see identical means.
+    x = np.cumsum(rng.integers(1, 4, n)).astype(np.float64)
+    x -= x[0]
+    y = rng.integers(-1000, 1000, n).astype(np.float64)
+    np.testing.assert_array_equal(lttb_indices(x, [y], n_out), plain_lttb(x, y, n_out))
+
+
+def test_keeps_every_point_when_not_reducing():
+    x = np.arange(10.0)
+    np.testing.assert_array_equal(lttb_indices(x, [x], 10), np.arange(10))
+    np.testing.assert_array_equal(lttb_indices(x, [x], 2), np.arange(10))
+
+
+def test_missing_values_never_win_a_bucket():
+    rng = np.random.default_rng(0)
+    x = np.arange(500.0)
+    y = rng.normal(size=500)
+    y[rng.random(500) < 0.3] = np.nan
+    selected = lttb_indices(x, [y], 50)
+    assert not np.isnan(y[selected[1:-1]]).any()
+
+
+def test_downsample_frame_keeps_columns_aligned():
+    n = 1000
+    df = pd.DataFrame(
+        {
+            "target_timestamp": np.arange(n, dtype=np.int64) * 900_000,
+            "forecast_value": np.sin(np.arange(n) / 20),
+            "actual_value": np.cos(np.arange(n) / 20),
+        }
+    )
+    out = downsample_frame(df, 100)
+    assert len(out) == 100
+    assert out["target_timestamp"].is_monotonic_increasing
+    pd.testing.assert_frame_equal(out, df.loc[out.index])
@@ -0,0 +1,35 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+from analytics.metrics import compute_metrics
+from benchmarks.synthetic_fleet import feeder_metadata, forecast_chunks
+from db.async_db_manager import AsyncDBManager
+from db.db_manager_api import DBManager
+from db.storage_backends import DuckDBBackend
+
+
+def test_summary_errors_and_count_cover_only_rows_with_actuals():
+    rows = pd.concat(forecast_chunks([7], days=2), ignore_index=True)
+    last_day = rows["target_timestamp"] >= rows["target_timestamp"].max().floor("D")
+    # Actuals for the first half of the latest day, and missing in between.
+    rows.loc[last_day, "actual_value"] = rows.loc[last_day, "forecast_value"] * 1.1
+    rows.loc[last_day & (rows["target_timestamp"].dt.hour >= 12), "actual_value"] = np.nan
+    rows.loc[last_day & (rows["target_timestamp"].dt.hour == 3), "actual_value"] = np.nan
+    backend = DuckDBBackend(":memory:")
+    backend.insert_feeders(feeder_metadata([7]))
+    backend.insert_forecasts(rows)
+    db = AsyncDBManager(DBManager(backend=backend))
+
+    [summary] = asyncio.run(db.load_feeder_summary())
+
+    day = rows[last_day]
+    observed = day[day["actual_value"].notna()]
+    expected = compute_metrics(observed["forecast_value"], observed["actual_value"])
+    assert summary["count"] == len(observed) == 44
+    for metric in ("mae", "rmse", "smape"):
+        assert np.isclose(summary[metric], expected[metric])
+    assert np.isclose(summary["peak_load"], day["forecast_value"].max())
+    assert np.isclose(summary["average_load"], day["forecast_value"].mean())
+    db.close()
@@ -0,0 +1,71 @@
+import pandas as pd
+
+from db.forecast_cache import ForecastCache
+
+
+def frame(rows: int) -> pd.DataFrame:
+    return pd.DataFrame({"forecast_value": [1.0] * rows})
+
+
+def test_hits_misses_and_ratio():
+    cache = ForecastCache()
+    df = frame(10)
+    assert cache.get("a") is None
+    cache.put("a", df)
+    assert cache.get("a") is df
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["hit_ratio"] == 0.5
+    assert stats["bytes"] == ForecastCache.frame_nbytes(df)
+
+
+def test_least_recently_used_entry_is_evicted_over_budget():
+    one = ForecastCache.frame_nbytes(frame(100))
+    cache = ForecastCache(max_bytes=int(2.5 * one))
+    cache.put("a", frame(100))
+    cache.put("b", frame(100))
+    cache.get("a")  # b is now the least recently used
+    cache.put("c", frame(100))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+
+def test_frames_larger_than_the_budget_are_not_cached():
+    cache = ForecastCache(max_bytes=ForecastCache.frame_nbytes(frame(10)))
+    cache.put("small", frame(10))
+    cache.put("big", frame(1000))
+    assert cache.get("big") is None
+    assert cache.get("small") is not None
+
+
+def test_replacing_a_key_keeps_the_byte_count_exact():
+    cache = ForecastCache()
+    cache.put("a", frame(10))
+    cache.put("a", frame(100))
+    assert cache.stats()["entries"] == 1
+    assert cache.stats()["bytes"] == ForecastCache.frame_nbytes(frame(100))
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("db.forecast_cache.time.monotonic", lambda: now[0])
+    cache = ForecastCache(ttl_seconds=60)
+    cache.put("a", frame(10))
+    now[0] += 59
+    assert cache.get("a") is not None
+    now[0] += 2
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 0
+
+
+def test_invalidate_by_predicate():
+    cache = ForecastCache()
+    for key in [(1, "x"), (1, "y"), (2, "x")]:
+        cache.put(key, frame(10))
+    cache.invalidate(lambda key: key[0] == 1)
+    assert cache.get((1, "x")) is None and cache.get((1, "y")) is None
+    assert cache.get((2, "x")) is not None
+    cache.invalidate()
+    assert cache.stats()["entries"] == 0 and cache.stats()["bytes"] == 0
@@ -0,0 +1,111 @@
+import asyncio
+import gzip
+
+import pytest
+
+from http_cache import CompressionMiddleware, etag_matches, make_etag, negotiate_encoding, opaque_tag
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, coding",
+    [("gzip, deflate, br", "br"), ("gzip", "gzip"), ("br;q=0, gzip;q=0.5", "gzip"), ("identity", None), ("", None), ("br;q=x", None)],
+)
+def test_negotiate_encoding(accept_encoding, coding):
+    assert negotiate_encoding(accept_encoding) == coding
+
+
+def test_etags_match_across_weakness_and_content_coding():
+    etag = make_etag("1609545600000.192.96", "json")
+    assert etag == '"1609545600000.192.96-json"'
+    assert opaque_tag('W/"1609545600000.192.96-json-br"') == "1609545600000.192.96-json"
+    assert etag_matches('"1609545600000.192.96-json-gzip"', etag)
+    assert etag_matches('"other", W/"1609545600000.192.96-json"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"1609545600000.192.95-json"', etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('"x"', None)
+    assert make_etag(None) is None
+
+
+@pytest.mark.parametrize("coding", ["br", "gzip"])
+def test_compressed_responses_carry_a_coding_suffixed_etag_and_revalidate(client, coding):
+    response = client.get("/forecasts/1", headers={"Accept-Encoding": coding})
+    assert response.headers["content-encoding"] == coding
+    assert "Accept-Encoding" in response.headers["vary"]
+    etag = response.headers["etag"]
+    assert etag.endswith(f'-{coding}"')
+
+    identity = client.get("/forecasts/1", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+    assert identity.headers["etag"] == etag.replace(f"-{coding}", "")
+    assert identity.content == response.content  # the test client decodes the compressed body
+
+    # Revalidating the compressed copy confirms that copy's tag; the plain tag validates too.
+    not_modified = client.get("/forecasts/1", headers={"Accept-Encoding": coding, "If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+    assert client.get("/forecasts/1", headers={"If-None-Match": identity.headers["etag"]}).status_code == 304
+
+
+def test_etag_depends_on_the_format(client):
+    json_etag = client.get("/forecasts/1").headers["etag"]
+    columnar = client.get("/forecasts/1", params={"format": "columnar"})
+    assert opaque_tag(columnar.headers["etag"]) != opaque_tag(json_etag)
+    assert client.get("/forecasts/1", params={"format": "columnar"}, headers={"If-None-Match": json_etag}).status_code == 200
+
+
+def test_weak_metrics_etags_are_not_suffixed(client):
+    response = client.get("/metrics/1", headers={"Accept-Encoding": "gzip"})
+    etag = response.headers["etag"]
+    assert etag.startswith('W/"') and not etag.endswith('-gzip"')
+    assert client.get("/metrics/1", headers={"If-None-Match": etag}).status_code == 304
+
+
+def run_middleware(app, headers, path="/forecasts/1", sent=None, **kwargs):
+    """Run CompressionMiddleware around `app` for one GET, returning the messages it sends (appended to `sent`)."""
+    sent = [] if sent is None else sent
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": path, "headers": headers}
+    asyncio.run(CompressionMiddleware(app, paths=("/forecasts",), **kwargs)(scope, receive, send))
+    return sent
+
+
+def test_small_bodies_are_not_compressed_and_gzip_output_is_deterministic():
+    body = b'{"forecasts": []}' * 100
+
+    def app_for(payload):
+        async def app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": [(b"etag", b'"v1"')]})
+            await send({"type": "http.response.body", "body": payload})
+
+        return app
+
+    small = run_middleware(app_for(b"{}"), [(b"accept-encoding", b"gzip")], minimum_size=1024)
+    assert small[1]["body"] == b"{}"
+
+    first = run_middleware(app_for(body), [(b"accept-encoding", b"gzip")], minimum_size=1024)
+    second = run_middleware(app_for(body), [(b"accept-encoding", b"gzip")], minimum_size=1024)
+    assert first[1]["body"] == second[1]["body"]
+    assert gzip.decompress(first[1]["body"]) == body
+    assert (b"etag", b'"v1-gzip"') in first[0]["headers"]
+
+
+def test_event_streams_send_their_headers_before_any_event():
+    sent = []
+
+    async def stream(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/event-stream")]})
+        # What a client sees while the stream is idle: the headers must already be out.
+        assert [message["type"] for message in sent] == ["http.response.start"]
+        await send({"type": "http.response.body", "body": b"data: x\n\n" * 200, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    run_middleware(stream, [(b"accept-encoding", b"gzip")], path="/forecasts/1/stream", sent=sent, minimum_size=1)
+    assert [message["type"] for message in sent] == ["http.response.start", "http.response.body", "http.response.body"]
+    assert all(name != b"content-encoding" for name, _ in sent[0]["headers"])
@@ -0,0 +1,29 @@
+from conftest import FEEDER_IDS
+
+
+def test_leaderboard_ranks_every_feeder(client):
+    body = client.get("/metrics/leaderboard", params={"metric": "mae"}).json()
+    assert body["ranked_feeders"] == len(FEEDER_IDS)
+    assert [entry["rank"] for entry in body["entries"]] == list(range(1, len(FEEDER_IDS) + 1))
+    maes = [entry["mae"] for entry in body["entries"]]
+    assert maes == sorted(maes)
+
+
+def test_failed_chunk_is_an_error_and_not_cached(client, monkeypatch):
+    db = client.app.state.db.db
+    query = db.query_forecasts_for_api_batch
+    calls = []
+
+    def flaky(feeder_ids, **kwargs):
+        calls.append(feeder_ids)
+        if len(calls) == 1:
+            raise ConnectionError("database went away")
+        return query(feeder_ids, **kwargs)
+
+    monkeypatch.setattr(db, "query_forecasts_for_api_batch", flaky)
+    client.app.state.db.leaderboard_chunk_size = 1
+
+    assert client.get("/metrics/leaderboard").status_code == 503
+    retry = client.get("/metrics/leaderboard")
+    assert retry.status_code == 200
+    assert retry.json()["ranked_feeders"] == len(FEEDER_IDS)
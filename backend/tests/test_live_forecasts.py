@@ -0,0 +1,30 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from db.live_forecasts import LiveForecasts
+
+
+class IdleDB:
+    """Never answers, so the poller stays parked and only explicit publishes reach the queues."""
+
+    async def load_forecast_delta(self, feeder_id, since):
+        await asyncio.Event().wait()
+
+
+def test_a_subscriber_that_falls_behind_is_closed_without_blocking_others():
+    async def scenario():
+        live = LiveForecasts(IdleDB(), queue_size=2)
+        slow, fast = live.subscribe(1), live.subscribe(1)
+        cursor = datetime.now(timezone.utc)
+        for i in range(3):
+            live._publish(1, pd.DataFrame({"n": [i]}), cursor)
+            fast.get_nowait()
+
+        assert slow.qsize() == 1 and slow.get_nowait() is None
+        assert live.stats() == {"feeders": 1, "subscribers": 1}
+        live.unsubscribe(1, fast)
+        assert live.stats() == {"feeders": 0, "subscribers": 0}
+
+    asyncio.run(scenario())
@@ -0,0 +1,52 @@
+import pandas as pd
+
+from benchmarks.synthetic_fleet import MODEL_VERSION, TAG, feeder_metadata
+from conftest import FEEDER_IDS, fleet_rows
+from db.parquet_mirror import ParquetMirror
+from db.storage_backends import DuckDBBackend
+
+COLUMNS = ["forecast_run_timestamp", "forecast_value", "actual_value"]
+
+
+class RecordingBackend(DuckDBBackend):
+    """DuckDB backend remembering the size of every forecast page it returns."""
+
+    def __init__(self):
+        super().__init__(":memory:")
+        self.pages = []
+
+    def select_forecasts(self, *args, **kwargs):
+        df = super().select_forecasts(*args, **kwargs)
+        self.pages.append(len(df))
+        return df
+
+
+def assert_mirrors(mirror, backend):
+    """The mirror holds exactly the rows in the backend."""
+    columns = ["target_timestamp"] + COLUMNS
+    expected = backend.select_forecasts(MODEL_VERSION, TAG, columns=columns)[columns]
+    got = mirror.read(FEEDER_IDS, MODEL_VERSION, TAG, columns=columns).reset_index()[columns]
+    pd.testing.assert_frame_equal(got, expected, check_dtype=False)
+
+
+def test_first_sync_pages_by_feeder_then_syncs_incrementally(tmp_path):
+    backend = RecordingBackend()
+    backend.insert_feeders(feeder_metadata(FEEDER_IDS))
+    rows = fleet_rows()
+    last_run = rows["forecast_run_timestamp"].max()
+    backend.insert_forecasts(rows[rows["forecast_run_timestamp"] < last_run])
+    mirror = ParquetMirror(str(tmp_path), page_feeders=1)
+
+    assert not mirror.has(MODEL_VERSION, TAG)
+    first = mirror.sync(backend, MODEL_VERSION, TAG)
+    assert len(backend.pages) == len(FEEDER_IDS) and sum(backend.pages) == first
+    assert max(backend.pages) < first
+    assert_mirrors(mirror, backend)
+
+    backend.pages.clear()
+    backend.insert_forecasts(rows[rows["forecast_run_timestamp"] == last_run])
+    mirror.sync(backend, MODEL_VERSION, TAG)
+    assert len(backend.pages) == 1
+    assert mirror.watermark(MODEL_VERSION, TAG) == last_run
+    assert_mirrors(mirror, backend)
+    backend.close()
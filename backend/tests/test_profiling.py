@@ -0,0 +1,50 @@
+import threading
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from profiling import ProfilingMiddleware
+
+TOKEN = "secret"
+loop_threads = []
+
+
+async def teapot(request):
+    loop_threads.append(threading.current_thread())
+    return JSONResponse({"ok": True}, status_code=418)
+
+
+def profiled_client(output_dir: str = "") -> TestClient:
+    return TestClient(ProfilingMiddleware(Starlette(routes=[Route("/", teapot)]), token=TOKEN, output_dir=output_dir))
+
+
+def test_requests_without_the_token_are_not_profiled():
+    client = profiled_client()
+    assert client.get("/").status_code == 418
+    assert client.get("/", headers={"X-Profile": "wrong"}).json() == {"ok": True}
+
+
+def test_profile_replaces_the_body():
+    response = profiled_client().get("/", params={"profile": TOKEN, "profile_format": "speedscope"})
+    assert response.status_code == 200
+    assert response.headers["x-profiled-status"] == "418"
+    assert "speedscope" in response.json()["$schema"]
+
+
+def test_profile_is_rendered_and_written_off_the_event_loop(tmp_path, monkeypatch):
+    threads = []
+    render = ProfilingMiddleware.render
+
+    def recording_render(self, *args):
+        threads.append(threading.current_thread())
+        return render(self, *args)
+
+    monkeypatch.setattr(ProfilingMiddleware, "render", recording_render)
+    response = profiled_client(str(tmp_path)).get("/", headers={"X-Profile": TOKEN})
+
+    assert response.status_code == 418
+    assert response.json() == {"ok": True}
+    assert (tmp_path / response.headers["x-profile-file"]).read_text().startswith("<!DOCTYPE html>")
+    assert len(threads) == 1 and threads[0] is not loop_threads[-1]
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+from analytics.metrics import compute_frame_metrics
+from analytics.rollups import DAY_MS, RollupStore, rollup_metrics
+
+
+def series(days: int, start_ms: int = 0) -> pd.DataFrame:
+    timestamps = start_ms + np.arange(days * 96, dtype=np.int64) * 900_000
+    rng = np.random.default_rng(days)
+    forecast = rng.normal(100, 10, len(timestamps))
+    actual = forecast + rng.normal(0, 5, len(timestamps))
+    actual[-96:] = np.nan
+    return pd.DataFrame({"target_timestamp": timestamps, "forecast_value": forecast, "actual_value": actual})
+
+
+def test_day_buckets_add_up_to_the_raw_metrics():
+    store = RollupStore()
+    df = series(10)
+    store.ingest("a", df)
+    expected = compute_frame_metrics(df)
+    got = rollup_metrics(store.buckets("a", "day"))
+    assert got["count"] == expected["count"]
+    for metric in ("mae", "rmse", "smape", "peak_load"):
+        assert np.isclose(got[metric], expected[metric])
+
+
+def test_incremental_ingest_matches_a_full_build():
+    df = series(20)
+    full, incremental = RollupStore(), RollupStore(lookback_ms=DAY_MS)
+    full.ingest("a", df)
+    incremental.ingest("a", df.iloc[: 15 * 96])
+    since = incremental.refresh_from("a")
+    incremental.ingest("a", df[df["target_timestamp"] >= since], since)
+    for resolution in ("hour", "day", "week"):
+        pd.testing.assert_frame_equal(incremental.buckets("a", resolution), full.buckets("a", resolution))
+
+
+def test_least_recently_used_series_are_evicted_over_budget():
+    probe = RollupStore()
+    probe.ingest("probe", series(30))
+    one_series = probe.stats()["bytes"]
+
+    store = RollupStore(max_bytes=int(2.5 * one_series))
+    for key in ("a", "b"):
+        store.ingest(key, series(30))
+    store.buckets("a", "day")  # a is now more recently used than b
+    store.ingest("c", series(30))
+
+    assert store.stats()["series"] == 2
+    assert store.stats()["evictions"] == 1
+    assert store.stats()["bytes"] <= store.max_bytes
+    assert store.buckets("b", "day").empty
+    assert store.refresh_from("b") is None  # rebuilt in full on its next request
+    assert not store.buckets("a", "day").empty
+
+
+def test_a_series_over_budget_on_its_own_is_still_kept():
+    store = RollupStore(max_bytes=1)
+    store.ingest("a", series(5))
+    store.ingest("b", series(5))
+    assert store.stats()["series"] == 1
+    assert not store.buckets("b", "hour").empty
+
+
+def test_metrics_reject_limit_with_resolution(client):
+    assert client.get("/metrics/1", params={"resolution": "day", "limit": 10}).status_code == 422
+    assert client.get("/metrics/1", params={"resolution": "day"}).status_code == 200
@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from db.single_flight import SingleFlight
+from observability import REQUEST_TIMINGS, RequestTimings
+from profiling import PROFILING, RequestProfile
+
+
+def test_concurrent_calls_share_one_task():
+    async def scenario():
+        flight, calls = SingleFlight(), []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "rows"
+
+        results = await asyncio.gather(*(flight.do("key", fetch) for _ in range(5)))
+        assert results == ["rows"] * 5
+        assert len(calls) == 1
+        assert flight.stats() == {"in_flight": 0, "started": 1, "shared": 4}
+
+        # Released once done: the next call fetches again.
+        await flight.do("key", fetch)
+        assert len(calls) == 2
+
+    asyncio.run(scenario())
+
+
+def test_errors_reach_every_caller_and_release_the_key():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ConnectionError("down")
+
+        results = await asyncio.gather(*(flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, ConnectionError) for result in results)
+        assert flight.stats()["in_flight"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_a_cancelled_caller_does_not_cancel_the_others():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            return "rows"
+
+        first = asyncio.create_task(flight.do("key", fetch))
+        second = asyncio.create_task(flight.do("key", fetch))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert await second == "rows"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    asyncio.run(scenario())
+
+
+def test_each_caller_gets_the_shared_work_timings():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.01)
+            REQUEST_TIMINGS.get().add("db", 0.25)
+            return "rows"
+
+        async def request():
+            timings = RequestTimings()
+            REQUEST_TIMINGS.set(timings)
+            await flight.do("key", fetch)
+            return timings
+
+        for timings in await asyncio.gather(request(), request()):
+            assert timings.seconds["db"] == 0.25
+
+    asyncio.run(scenario())
+
+
+def test_profiled_requests_run_their_own_work():
+    async def scenario():
+        flight, calls = SingleFlight(), []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+
+        async def profiled():
+            PROFILING.set(RequestProfile(0.001))
+            await flight.do("key", fetch)
+
+        await asyncio.gather(flight.do("key", fetch), profiled())
+        assert len(calls) == 2
+        assert flight.stats()["shared"] == 0
+
+    asyncio.run(scenario())
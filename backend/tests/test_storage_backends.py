@@ -0,0 +1,29 @@
+import pytest
+
+from benchmarks.synthetic_fleet import MODEL_VERSION, TAG
+from conftest import fleet_rows
+from db.storage_backends import DuckDBBackend, StorageBackend
+
+
+def test_backends_must_implement_every_abstract_method():
+    class Partial(StorageBackend):
+        def feeder_ids(self):
+            return []
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_duckdb_insert_upserts_on_the_natural_key():
+    backend = DuckDBBackend(":memory:")
+    rows = fleet_rows()
+    backend.insert_forecasts(rows)
+    # A rerun of the same forecast and a backfill of actuals, loaded over the existing rows.
+    rerun = rows.assign(forecast_value=rows["forecast_value"] + 1, actual_value=rows["actual_value"].fillna(1.0))
+    backend.insert_forecasts(rerun)
+
+    stored = backend.select_forecasts(MODEL_VERSION, TAG, columns=["forecast_value", "actual_value"])
+    assert len(stored) == len(rows)
+    assert (stored["forecast_value"].to_numpy() == rerun["forecast_value"].to_numpy()).all()
+    assert stored["actual_value"].notna().all()
+    backend.close()
@@ -10,6 +10,7 @@ interface ForecastEntry {
 export const useForecastStore = defineStore("forecast", {
 	state: () => ({
 		forecastsByFeeder: {} as Record<number, ForecastEntry[]>,
+		cursorByFeeder: {} as Record<number, string>, // `since` cursor for the next delta fetch
 		selectedDates: [] as string[], // yyyy-MM-dd format
 		selectedFeederId: null as number | null,
 	}),
@@ -27,6 +28,32 @@ export const useForecastStore = defineStore("forecast", {
 		setForecasts(feederId: number, forecasts: ForecastEntry[]) {
 			this.forecastsByFeeder[feederId] = forecasts;
 		},
+		// Apply rows from fetchForecasts or fetchForecastDelta: rows for known timestamps replace the old ones in place, new ones appended.
+		mergeForecasts(feederId: number, delta: ForecastEntry[], cursor?: string) {
+			const forecasts = this.forecastsByFeeder[feederId] ?? [];
+			const positions = new Map<string, number>();
+			forecasts.forEach((f, i) => positions.set(f.target_timestamp, i));
+
+			let appended = false;
+			for (const row of delta) {
+				const i = positions.get(row.target_timestamp);
+				if (i === undefined) {
+					positions.set(row.target_timestamp, forecasts.length);
+					forecasts.push(row);
+					appended = true;
+				} else {
+					forecasts[i] = row;
+				}
+			}
+			// Deltas are ordered, so this only sorts when a row lands before existing ones.
+			if (appended && forecasts.some((f, i) => i > 0 && forecasts[i - 1].target_timestamp > f.target_timestamp)) {
+				forecasts.sort((a, b) => (a.target_timestamp < b.target_timestamp ? -1 : 1));
+			}
+			this.forecastsByFeeder[feederId] = forecasts;
+			// Without a cursor the next visit loads the full series again.
+			if (cursor) this.cursorByFeeder[feederId] = cursor;
+			else delete this.cursorByFeeder[feederId];
+		},
 		setSelectedDates(dates: string[]) {
 			this.selectedDates = dates;
 		},
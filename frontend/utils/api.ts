@@ -1,6 +1,34 @@
 // utils/api.ts
 import axios from "axios";
 
+// Last response per URL and query for the endpoints that send ETags, so reloads can revalidate them.
+const validated = new Map<string, { etag: string; data: any; headers: Record<string, any> }>();
+const MAX_VALIDATED = 100;
+
+// GET with If-None-Match: an unchanged resource comes back as an empty 304 and the kept copy is returned.
+async function getValidated(url: string, params: Record<string, any> = {}): Promise<{ data: any; headers: Record<string, any> }> {
+	const query = Object.entries(params)
+		.filter(([, value]) => value !== undefined && value !== null)
+		.sort(([a], [b]) => a.localeCompare(b));
+	const key = `${url}?${new URLSearchParams(query.map(([k, v]) => [k, String(v)])).toString()}`;
+	const cached = validated.get(key);
+	const response = await axios.get(url, {
+		params,
+		headers: cached ? { "If-None-Match": cached.etag } : {},
+		validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
+	});
+	if (response.status === 304 && cached) return { data: cached.data, headers: cached.headers };
+
+	validated.delete(key);
+	const etag = response.headers["etag"];
+	const headers = response.headers;
+	if (etag) {
+		validated.set(key, { etag, data: response.data, headers });
+		if (validated.size > MAX_VALIDATED) validated.delete(validated.keys().next().value as string);
+	}
+	return { data: response.data, headers };
+}
+
 export async function fetchFeeders() {
 	const config = useRuntimeConfig();
 	console.log("API Base URL:", config.public.apiBase); // ✅ Debug log
@@ -9,10 +37,72 @@ export async function fetchFeeders() {
 	return data.feeders;
 }
 
-export async function fetchForecasts(feederId: number) {
+export interface FeederSummary {
+	feeder_id: number;
+	last_forecast_timestamp: string | null; // latest target_timestamp, ISO 8601
+	peak_load: number; // metrics over that UTC day
+	average_load: number;
+	mae: number; // errors and count over the rows of that day with actuals
+	rmse: number;
+	smape: number;
+	count: number;
+}
+
+export async function fetchFeederSummary(): Promise<FeederSummary[]> {
+	const config = useRuntimeConfig();
+	const { data } = await axios.get(`${config.public.apiBase}/feeders/summary`);
+	return data.feeders;
+}
+
+export interface ForecastQuery {
+	start?: string; // ISO timestamp, inclusive
+	end?: string; // ISO timestamp, inclusive
+	limit?: number;
+	max_points?: number; // server-side LTTB downsampling for zoomed-out charts
+}
+
+export interface ForecastDelta {
+	forecasts: any[]; // rows changed after `since`
+	cursor?: string; // pass as `since` on the next call
+}
+
+// The full series, revalidated with its ETag; the cursor (when the server knows it) continues with fetchForecastDelta.
+export async function fetchForecasts(feederId: number, query: ForecastQuery = {}): Promise<ForecastDelta> {
 	const config = useRuntimeConfig();
 	console.log("API Base URL:", config.public.apiBase); // ✅ Debug log
 
-	const { data } = await axios.get(`${config.public.apiBase}/forecasts/${feederId}`);
-	return data.forecasts;
+	const { data, headers } = await getValidated(`${config.public.apiBase}/forecasts/${feederId}`, query);
+	return { forecasts: data.forecasts, cursor: headers["x-forecast-cursor"] };
+}
+
+// Rows from forecast runs (or target timestamps) newer than a cursor from fetchForecasts or an earlier delta.
+export async function fetchForecastDelta(feederId: number, since: string): Promise<ForecastDelta> {
+	const config = useRuntimeConfig();
+	const { data } = await axios.get(`${config.public.apiBase}/forecasts/${feederId}`, { params: { since } });
+	return data;
+}
+
+// Live deltas pushed over Server-Sent Events; the browser reconnects by itself and resumes from the last cursor.
+export function openForecastStream(feederId: number, since: string | undefined, onDelta: (delta: ForecastDelta) => void): EventSource {
+	const config = useRuntimeConfig();
+	const url = new URL(`${config.public.apiBase}/forecasts/${feederId}/stream`);
+	if (since) url.searchParams.set("since", since);
+	const source = new EventSource(url.toString());
+	source.addEventListener("delta", (event) => onDelta(JSON.parse((event as MessageEvent).data)));
+	return source;
+}
+
+// Load and accuracy metrics computed server-side (same shape and semantics as calculateMetrics in utils/metrics.ts,
+// whose load figures use actuals with the forecast as fallback; peak_load & co. describe the forecast).
+export async function fetchMetrics(feederId: number, query: ForecastQuery = {}) {
+	const config = useRuntimeConfig();
+	const { data } = await getValidated(`${config.public.apiBase}/metrics/${feederId}`, query);
+	return {
+		peakLoad: data.actual_peak_load,
+		minLoad: data.actual_min_load,
+		averageLoad: data.actual_average_load,
+		mae: data.mae,
+		rmse: data.rmse,
+		smape: data.smape,
+	};
 }